@@ -1,20 +1,12 @@
-import aiofiles
 from voicevox import voicevox
 
 class aivisspeech(voicevox):
     def __init__(self, text: str, speaker: int, speed: float):
         super().__init__(text, speaker, speed)
-        self.url = self.config['aivisspeech']['url']
-        self.params = {
-            'text': text,
-            'speaker': speaker
-        }
+        self.engine_config = self.config.aivisspeech
 
-    async def get_audio(self) -> str:
+    async def get_audio(self) -> bytes:
         try:
-            wav = await self._get_engine()
-            async with aiofiles.tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                await temp_file.write(wav)
-            return temp_file.name
+            return await self._get_engine()
         except Exception as e:
             raise RuntimeError(e)
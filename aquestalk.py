@@ -1,106 +1,111 @@
+import asyncio
 import ctypes
 import platform
 import os
-import aiofiles
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from typing import Dict, Tuple
+
+_libraries: Dict[Tuple[str, str], ctypes.CDLL] = {}
+_phonts: Dict[str, ctypes.Array] = {}
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+
+def _library_path(engine: str, voice_name: str) -> str:
+    system = platform.system().lower()
+    match engine, system:
+        case 'aquestalk1', 'windows':
+            return os.path.join(os.path.dirname(__file__), 'AquesTalk1', 'lib', voice_name, 'AquesTalk.dll')
+        case 'aquestalk1', 'linux':
+            return os.path.join(os.path.dirname(__file__), 'AquesTalk1', 'lib', voice_name, 'libAquesTalk.so')
+        case 'aquestalk2', 'windows':
+            return os.path.join(os.path.dirname(__file__), 'AquesTalk2', 'lib', voice_name, 'AquesTalk2.dll')
+        case 'aquestalk2', 'linux':
+            return os.path.join(os.path.dirname(__file__), 'AquesTalk2', 'lib', voice_name, 'libAquesTalk2Eva.so')
+
+def load_aquestalk1(voice_name: str) -> ctypes.CDLL:
+    with _lock:
+        aquestalk = _libraries.get(('aquestalk1', voice_name))
+        if aquestalk is None:
+            aquestalk = ctypes.CDLL(_library_path('aquestalk1', voice_name))
+            aquestalk.AquesTalk_Synthe_Utf8.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
+            aquestalk.AquesTalk_Synthe_Utf8.restype = ctypes.POINTER(ctypes.c_ubyte)
+            aquestalk.AquesTalk_FreeWave.argtypes = [ctypes.POINTER(ctypes.c_ubyte)]
+            aquestalk.AquesTalk_FreeWave.restype = None
+            _libraries[('aquestalk1', voice_name)] = aquestalk
+        return aquestalk
+
+def load_aquestalk2(voice_name: str) -> Tuple[ctypes.CDLL, ctypes.Array]:
+    with _lock:
+        aquestalk = _libraries.get(('aquestalk2', voice_name))
+        if aquestalk is None:
+            aquestalk = ctypes.CDLL(_library_path('aquestalk2', voice_name))
+            aquestalk.AquesTalk2_Synthe_Utf8.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.c_void_p]
+            aquestalk.AquesTalk2_Synthe_Utf8.restype = ctypes.POINTER(ctypes.c_ubyte)
+            aquestalk.AquesTalk2_FreeWave.argtypes = [ctypes.POINTER(ctypes.c_ubyte)]
+            aquestalk.AquesTalk2_FreeWave.restype = None
+            _libraries[('aquestalk2', voice_name)] = aquestalk
+
+        phont = _phonts.get(voice_name)
+        if phont is None:
+            phont_file = os.path.join(os.path.dirname(__file__), 'AquesTalk2', 'phont', f"{voice_name}.phont")
+            try:
+                with open(phont_file, 'rb') as f:
+                    phont = ctypes.create_string_buffer(f.read())
+            except OSError as e:
+                raise RuntimeError(f"Phontファイルの読み込みに失敗しました: {phont_file}") from e
+            _phonts[voice_name] = phont
+        return aquestalk, phont
+
+def synthesize_aquestalk1(text: str, speed: int, voice_name: str) -> bytes:
+    aquestalk = load_aquestalk1(voice_name)
+    size = ctypes.c_int(0)
+
+    wav_data = aquestalk.AquesTalk_Synthe_Utf8(text.encode('utf-8'), int(speed), ctypes.byref(size))
+
+    if not wav_data:
+        raise RuntimeError(f"音声データの生成に失敗しました (エラーコード: {size.value})")
+
+    try:
+        return ctypes.string_at(wav_data, size.value)
+    finally:
+        aquestalk.AquesTalk_FreeWave(wav_data)
+
+def synthesize_aquestalk2(text: str, speed: int, voice_name: str) -> bytes:
+    aquestalk, phont = load_aquestalk2(voice_name)
+    size = ctypes.c_int(0)
+
+    wav_data = aquestalk.AquesTalk2_Synthe_Utf8(text.encode('utf-8'), int(speed), ctypes.byref(size), ctypes.cast(phont, ctypes.c_void_p))
+
+    if not wav_data:
+        raise RuntimeError(f"音声データの生成に失敗しました (エラーコード: {size.value})")
+
+    try:
+        return ctypes.string_at(wav_data, size.value)
+    finally:
+        aquestalk.AquesTalk2_FreeWave(wav_data)
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, Config.get().aquestalk.workers), thread_name_prefix='aquestalk')
+    return _executor
 
 class AquesTalk1:
     def __init__(self, text: str, speed: int, voice_name: str):
         self.text = text
         self.speed = speed
         self.voice_name = voice_name
-        self.temp_file = None
-        self.aquestalk = None
-
-    def init(self) -> None:
-        system = platform.system().lower()
-        match system:
-            case 'windows':
-                path = os.path.join(os.path.dirname(__file__), 'AquesTalk1', 'lib', self.voice_name, 'AquesTalk.dll')
-            case 'linux':
-                path = os.path.join(os.path.dirname(__file__), 'AquesTalk1', 'lib', self.voice_name, 'libAquesTalk.so')
-
-        self.aquestalk = ctypes.CDLL(path)
-
-        self.aquestalk.AquesTalk_Synthe_Utf8.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int)]
-        self.aquestalk.AquesTalk_Synthe_Utf8.restype = ctypes.POINTER(ctypes.c_ubyte)
-        self.aquestalk.AquesTalk_FreeWave.argtypes = [ctypes.POINTER(ctypes.c_ubyte)]
-        self.aquestalk.AquesTalk_FreeWave.restype = None
-
-    async def get_audio(self) -> str:
-        if self.aquestalk is None:
-            self.init()
-
-        size = ctypes.c_int(0)
-
-        wav_data = self.aquestalk.AquesTalk_Synthe_Utf8(self.text.encode('utf-8'), self.speed, ctypes.byref(size))
-
-        if wav_data is None:
-            raise RuntimeError('音声データの生成に失敗しました')
-
-        try:
-            async with aiofiles.tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp:
-                self.temp_file = temp.name
-                buffer = ctypes.string_at(wav_data, size.value)
-                await temp.write(buffer)
-            return self.temp_file
-        except Exception as e:
-            raise e
-        finally:
-            self.aquestalk.AquesTalk_FreeWave(wav_data)
+
+    async def get_audio(self) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), synthesize_aquestalk1, self.text, self.speed, self.voice_name)
 
 class AquesTalk2:
     def __init__(self, text: str, speed: int, voice_name: str):
         self.text = text
         self.speed = speed
         self.voice_name = voice_name
-        self.temp_file = None
-        self.aquestalk = None
-
-    async def init(self) -> None:
-        system = platform.system().lower()
-        match system:
-            case 'windows':
-                path = os.path.join(os.path.dirname(__file__), 'AquesTalk2', 'lib', self.voice_name, 'AquesTalk2.dll')
-            case 'linux':
-                path = os.path.join(os.path.dirname(__file__), 'AquesTalk2', 'lib', self.voice_name, 'libAquesTalk2Eva.so')
-
-        phont_file = os.path.join(os.path.dirname(__file__), 'AquesTalk2', 'phont', f"{self.voice_name}.phont")
-
-        self.aquestalk = ctypes.CDLL(path)
-
-        self.aquestalk.AquesTalk2_Synthe_Utf8.argtypes = [ctypes.c_char_p, ctypes.c_int, ctypes.POINTER(ctypes.c_int), ctypes.c_void_p]
-        self.aquestalk.AquesTalk2_Synthe_Utf8.restype = ctypes.POINTER(ctypes.c_ubyte)
-        self.aquestalk.AquesTalk2_FreeWave.argtypes = [ctypes.POINTER(ctypes.c_ubyte)]
-        self.aquestalk.AquesTalk2_FreeWave.restype = None
-
-        try:
-            async with aiofiles.open(phont_file, 'rb') as f:
-                data = await f.read()
-                self.phont_ptr = ctypes.cast(ctypes.create_string_buffer(data), ctypes.c_void_p)
-        except Exception as e:
-            raise e
-
-        if self.phont_ptr is None:
-            raise RuntimeError(f"Phontファイルの読み込みに失敗しました: {phont_file}")
-
-    async def get_audio(self) -> str:
-        if self.aquestalk is None:
-            await self.init()
-
-        size = ctypes.c_int(0)
-
-        wav_data = self.aquestalk.AquesTalk2_Synthe_Utf8(self.text.encode('utf-8'), self.speed, ctypes.byref(size), self.phont_ptr)
-
-        if wav_data is None:
-            raise RuntimeError('音声データの生成に失敗しました')
-
-        try:
-            async with aiofiles.tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp:
-                self.temp_file = temp.name
-                buffer = ctypes.string_at(wav_data, size.value)
-                await temp.write(buffer)
-            return self.temp_file
-        except Exception as e:
-            raise e
-        finally:
-            self.aquestalk.AquesTalk2_FreeWave(wav_data)
+
+    async def get_audio(self) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), synthesize_aquestalk2, self.text, self.speed, self.voice_name)
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from loguru import logger
+from config import Config
+from lru import LRUCache
+
+class AudioCache:
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AudioCache, cls).__new__(cls)
+            cache_config = Config.get().cache
+            cls._instance.enabled = cache_config.enabled
+            cls._instance.memory = LRUCache(cache_config.memory_entries, cache_config.memory_size, len)
+            cls._instance.disk_path = os.path.join(os.path.dirname(__file__), cache_config.disk_path)
+            cls._instance.disk_size = cache_config.disk_size
+            cls._instance.disk_index = None
+            cls._instance.disk_usage = 0
+            cls._instance.memory_hits = 0
+            cls._instance.disk_hits = 0
+            cls._instance.misses = 0
+        return cls._instance
+
+    @staticmethod
+    def make_key(engine: str, voice_name: str, speed: float, text: str, edition: str = '') -> str:
+        normalized = unicodedata.normalize('NFKC', text).strip()
+        if edition:
+            engine = f"{engine}:{edition}"
+        return hashlib.sha256(f"{engine}\0{voice_name}\0{float(speed)}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def _disk_file(self, key: str) -> str:
+        return os.path.join(self.disk_path, f"{key}.wav")
+
+    def _scan_disk(self) -> list:
+        os.makedirs(self.disk_path, exist_ok=True)
+        entries = []
+        with os.scandir(self.disk_path) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.wav'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        entries.sort()
+        return entries
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _write_file(path: str, data: bytes) -> None:
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _remove_files(paths: list) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"音声キャッシュの削除に失敗しました: {e}")
+
+    async def _load_disk_index(self) -> None:
+        entries = await asyncio.to_thread(self._scan_disk)
+        if self.disk_index is not None:
+            return
+        self.disk_index = OrderedDict((key, size) for _, key, size in entries)
+        self.disk_usage = sum(self.disk_index.values())
+        if Config.get().debug:
+            logger.debug(f"音声キャッシュを読み込みました - {len(self.disk_index)}件, {self.disk_usage}バイト")
+
+    async def _evict_disk(self) -> None:
+        paths = []
+        while self.disk_index and self.disk_usage > self.disk_size:
+            key, size = self.disk_index.popitem(last=False)
+            self.disk_usage -= size
+            paths.append(self._disk_file(key))
+        if paths:
+            await asyncio.to_thread(self._remove_files, paths)
+
+    async def get(self, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory_hits += 1
+            return data
+
+        if self.disk_size > 0:
+            if self.disk_index is None:
+                await self._load_disk_index()
+            try:
+                data = await asyncio.to_thread(self._read_file, self._disk_file(key))
+            except OSError:
+                if key in self.disk_index:
+                    self.disk_usage -= self.disk_index.pop(key)
+            else:
+                if key in self.disk_index:
+                    self.disk_index.move_to_end(key)
+                else:
+                    self.disk_index[key] = len(data)
+                    self.disk_usage += len(data)
+                self.memory.put(key, data)
+                self.disk_hits += 1
+                return data
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes) -> None:
+        if not self.enabled:
+            return
+
+        self.memory.put(key, data)
+
+        if self.disk_size <= 0 or len(data) > self.disk_size:
+            return
+        if self.disk_index is None:
+            await self._load_disk_index()
+        if key in self.disk_index:
+            return
+
+        try:
+            await asyncio.to_thread(self._write_file, self._disk_file(key), data)
+        except OSError as e:
+            logger.warning(f"音声キャッシュの書き込みに失敗しました: {e}")
+            return
+
+        self.disk_index[key] = len(data)
+        self.disk_usage += len(data)
+        await self._evict_disk()
+
+    def stats(self) -> dict:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.disk_hits) / total if total else 0.0,
+            'memory_entries': len(self.memory),
+            'memory_size': self.memory.weight,
+            'disk_entries': len(self.disk_index) if self.disk_index is not None else 0,
+            'disk_size': self.disk_usage
+        }
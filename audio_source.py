@@ -0,0 +1,101 @@
+import struct
+import discord
+from typing import Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+FRAME_SIZE = SAMPLE_RATE // 1000 * 20 * CHANNELS * 2
+
+class MemoryAudioReader:
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self.buffer = memoryview(data)
+        self.position = 0
+
+    def read(self, size: int = -1) -> memoryview:
+        if size < 0:
+            end = len(self.buffer)
+        else:
+            end = min(self.position + size, len(self.buffer))
+        chunk = self.buffer[self.position:end]
+        self.position = end
+        return chunk
+
+class WavPCMAudio(discord.AudioSource):
+    def __init__(self, data: bytes | bytearray | memoryview):
+        self.pcm = convert_wav_to_pcm(data)
+        self.position = 0
+
+    def read(self) -> bytes:
+        if self.position >= len(self.pcm):
+            return b''
+        frame = self.pcm[self.position:self.position + FRAME_SIZE]
+        self.position += FRAME_SIZE
+        if len(frame) < FRAME_SIZE:
+            frame += b'\x00' * (FRAME_SIZE - len(frame))
+        return frame
+
+    def is_opus(self) -> bool:
+        return False
+
+def parse_wav(data: bytes | bytearray | memoryview) -> Tuple[int, int, int, int, memoryview]:
+    view = memoryview(data)
+    if len(view) < 12 or view[0:4] != b'RIFF' or view[8:12] != b'WAVE':
+        raise ValueError('WAVEファイルではありません')
+
+    fmt = None
+    position = 12
+    while position + 8 <= len(view):
+        chunk_id = bytes(view[position:position + 4])
+        chunk_size = struct.unpack_from('<I', view, position + 4)[0]
+        body = position + 8
+        if chunk_id == b'fmt ':
+            if chunk_size < 16:
+                raise ValueError('fmtチャンクが不正です')
+            fmt = struct.unpack_from('<HHIIHH', view, body)
+        elif chunk_id == b'data':
+            if fmt is None:
+                raise ValueError('fmtチャンクがありません')
+            format_tag, channels, sample_rate, _, _, bits = fmt
+            return format_tag, channels, sample_rate, bits, view[body:min(body + chunk_size, len(view))]
+        position = body + chunk_size + (chunk_size & 1)
+
+    raise ValueError('dataチャンクがありません')
+
+def convert_wav_to_pcm(data: bytes | bytearray | memoryview) -> bytes:
+    if np is None:
+        raise ValueError('numpyがインストールされていません')
+
+    format_tag, channels, sample_rate, bits, pcm = parse_wav(data)
+    if format_tag != 1 or channels not in (1, 2) or bits not in (8, 16) or not 0 < sample_rate <= SAMPLE_RATE:
+        raise ValueError(f"未対応のWAVE形式です: format={format_tag}, channels={channels}, rate={sample_rate}, bits={bits}")
+
+    if bits == 16:
+        samples = np.frombuffer(pcm, dtype='<i2', count=len(pcm) // 2).astype(np.float32)
+    else:
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) * 256.0
+
+    frames = len(samples) // channels
+    samples = samples[:frames * channels].reshape(frames, channels)
+
+    if sample_rate != SAMPLE_RATE and frames > 0:
+        out_frames = frames * SAMPLE_RATE // sample_rate
+        positions = np.arange(out_frames, dtype=np.float64) * (sample_rate / SAMPLE_RATE)
+        source_positions = np.arange(frames, dtype=np.float64)
+        samples = np.stack([np.interp(positions, source_positions, samples[:, channel]) for channel in range(channels)], axis=1)
+
+    if channels == 1:
+        samples = np.repeat(samples, CHANNELS, axis=1)
+
+    return np.clip(np.rint(samples), -32768, 32767).astype('<i2').tobytes()
+
+def create_audio_source(data: bytes | bytearray | memoryview) -> discord.AudioSource:
+    try:
+        return WavPCMAudio(data)
+    except ValueError:
+        pass
+    return discord.FFmpegPCMAudio(MemoryAudioReader(data), pipe=True, before_options='-guess_layout_max 0')
@@ -0,0 +1,79 @@
+import argparse
+import io
+import os
+import sys
+import time
+import wave
+import numpy as np
+from typing import Callable
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from audio_source import MemoryAudioReader, WavPCMAudio
+
+def generate_wav(sample_rate: int, seconds: float) -> bytes:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    samples = np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 3 * t) * 12000
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.astype('<i2').tobytes())
+    return buffer.getvalue()
+
+def drain(factory: Callable[[], discord.AudioSource]) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    source = factory()
+    first_frame = None
+    frames = 0
+    while True:
+        frame = source.read()
+        if first_frame is None:
+            first_frame = time.perf_counter() - start
+        if not frame:
+            break
+        frames += 1
+    source.cleanup()
+    return first_frame, time.perf_counter() - start, frames
+
+def bench(name: str, data: bytes, iterations: int) -> None:
+    for label, factory in (
+        ('native', lambda: WavPCMAudio(data)),
+        ('ffmpeg', lambda: discord.FFmpegPCMAudio(MemoryAudioReader(data), pipe=True, before_options='-guess_layout_max 0'))
+    ):
+        first_frames = []
+        totals = []
+        try:
+            for _ in range(iterations):
+                first_frame, total, frames = drain(factory)
+                first_frames.append(first_frame)
+                totals.append(total)
+        except discord.ClientException as e:
+            logger.warning(f"{name:<10} {label:<6} 計測できませんでした: {e}")
+            continue
+        logger.info(
+            f"{name:<10} {label:<6} フレーム数: {frames:>5} "
+            f"初回フレーム: {np.median(first_frames) * 1000:8.2f}ms "
+            f"全体: {np.median(totals) * 1000:8.2f}ms (中央値, {iterations}回)"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='WAVからDiscord PCMへの変換速度を比較します')
+    parser.add_argument('files', nargs='*', help='比較に使うWAVファイル (省略時は合成音声相当のWAVを生成)')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.files:
+        for path in args.files:
+            with open(path, 'rb') as f:
+                bench(os.path.basename(path), f.read(), args.iterations)
+    else:
+        bench('AquesTalk', generate_wav(8000, args.seconds), args.iterations)
+        bench('VOICEVOX', generate_wav(24000, args.seconds), args.iterations)
+
+if __name__ == '__main__':
+    main()
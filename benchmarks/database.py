@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from loguru import logger
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosqlite
+from config import Config, DatabaseSection
+from database_backend import DatabaseBackend, SQLiteBackend, create_backend
+from stats import percentile
+
+ENGINES = ('voicevox', 'aivisspeech', 'aquestalk1', 'aquestalk2')
+
+class LegacySQLiteBackend(DatabaseBackend):
+    placeholder = SQLiteBackend.placeholder
+    schema = SQLiteBackend.schema
+    statements = SQLiteBackend.statements
+
+    def __init__(self, config: DatabaseSection):
+        super().__init__(config)
+        self.connection: aiosqlite.Connection | None = None
+
+    async def connect(self) -> None:
+        self.connection = await aiosqlite.connect(self.config.database)
+        for sql in self.schema:
+            await self.connection.execute(sql)
+        await self.connection.commit()
+
+    async def fetchone(self, name: str, params: Tuple = (), repeat: int = 0) -> Tuple | None:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(self.statement(name, repeat), params)
+            return await cursor.fetchone()
+
+    async def fetchall(self, name: str, params: Tuple = (), repeat: int = 0) -> List[Tuple]:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(self.statement(name, repeat), params)
+            return await cursor.fetchall()
+
+    async def execute(self, name: str, params: Tuple = ()) -> None:
+        async with self.connection.cursor() as cursor:
+            await cursor.execute(self.statement(name), params)
+            await self.connection.commit()
+
+    async def close(self) -> None:
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(values),
+        'p50': percentile(values, 0.5),
+        'p99': percentile(values, 0.99),
+        'max': max(values, default=0.0)
+    }
+
+async def seed(backend: DatabaseBackend, guilds: int, users: int) -> None:
+    writes = []
+    for guild_id in range(guilds):
+        for user_id in range(users):
+            writes.append(backend.execute('set_voice_settings', (guild_id, user_id, str(user_id % 50), 100, ENGINES[user_id % len(ENGINES)])))
+        for i in range(20):
+            writes.append(backend.execute('set_dictionary_replacement', (guild_id, f"単語{i}", f"たんご{i}")))
+    await asyncio.gather(*writes)
+
+async def client(backend: DatabaseBackend, rng: random.Random, args: argparse.Namespace, deadline: float, reads: List[float], writes: List[float]) -> None:
+    while time.perf_counter() < deadline:
+        guild_id = rng.randrange(args.guilds)
+        start = time.perf_counter()
+        if rng.random() < args.write_ratio:
+            if rng.random() < 0.5:
+                await backend.execute('set_voice_settings', (guild_id, rng.randrange(args.users), str(rng.randrange(50)), rng.randrange(50, 200), rng.choice(ENGINES)))
+            else:
+                await backend.execute('set_dictionary_replacement', (guild_id, f"単語{rng.randrange(40)}", f"よみ{rng.randrange(1000)}"))
+            writes.append(time.perf_counter() - start)
+        else:
+            if rng.random() < 0.8:
+                await backend.fetchone('get_voice_settings', (guild_id, rng.randrange(args.users)))
+            else:
+                await backend.fetchall('get_dictionary_replacements', (guild_id,))
+            reads.append(time.perf_counter() - start)
+
+async def run_backend(name: str, config: DatabaseSection, args: argparse.Namespace) -> Dict:
+    backend = LegacySQLiteBackend(config) if name == 'legacy' else create_backend(config)
+    await backend.connect()
+    try:
+        await seed(backend, args.guilds, args.users)
+        reads: List[float] = []
+        writes: List[float] = []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*(client(backend, random.Random(i), args, deadline, reads, writes) for i in range(args.clients)))
+    finally:
+        await backend.close()
+
+    result = {
+        'backend': name,
+        'operations_per_second': (len(reads) + len(writes)) / args.duration,
+        'reads': summarize(reads),
+        'writes': summarize(writes)
+    }
+    logger.info(
+        f"{name:7s} - {result['operations_per_second']:9.1f}件/秒, "
+        f"読み込み p50: {result['reads']['p50'] * 1000:7.2f}ms p99: {result['reads']['p99'] * 1000:7.2f}ms, "
+        f"書き込み p50: {result['writes']['p50'] * 1000:7.2f}ms p99: {result['writes']['p99'] * 1000:7.2f}ms"
+    )
+    return result
+
+async def run(args: argparse.Namespace) -> Dict:
+    results = []
+    for name in args.backends:
+        if name == 'mysql':
+            config = dataclasses.replace(Config.get().database, connection='mysql')
+            results.append(await run_backend(name, config, args))
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            config = dataclasses.replace(DatabaseSection(), connection='sqlite', database=os.path.join(directory, 'bench.db'))
+            results.append(await run_backend(name, config, args))
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'clients': args.clients,
+            'duration': args.duration,
+            'write_ratio': args.write_ratio,
+            'guilds': args.guilds,
+            'users': args.users
+        },
+        'results': results
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='読み込みと書き込みが混在する負荷でデータベースの性能を計測します')
+    parser.add_argument('--backends', type=lambda value: value.split(','), default=['legacy', 'sqlite'], help='legacy, sqlite, mysql (mysqlはconfig.yamlのdatabase設定を使用)')
+    parser.add_argument('--clients', type=int, default=50, help='同時に処理を行うクライアント数')
+    parser.add_argument('--duration', type=float, default=10.0, help='計測時間(秒)')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='書き込みの割合')
+    parser.add_argument('--guilds', type=int, default=100)
+    parser.add_argument('--users', type=int, default=50, help='サーバーごとのユーザー数')
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', f"database-{datetime.now():%Y%m%d-%H%M%S}.json"))
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"結果を保存しました: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import random
+import sys
+import time
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dictionary import DictionaryMatcher
+
+HIRAGANA = ''.join(chr(c) for c in range(ord('ぁ'), ord('ゖ') + 1))
+KATAKANA = ''.join(chr(c) for c in range(ord('ァ'), ord('ヺ') + 1))
+KANJI = '日本語読上音声設定参加退出草今何時間話題配信遊戯開始終了'
+
+def random_word(rng: random.Random) -> str:
+    alphabet = rng.choice((HIRAGANA, KATAKANA, KANJI, 'abcdefghijklmnopqrstuvwxyz'))
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 8)))
+
+def sequential_replace(replacements: dict, text: str) -> str:
+    for original, replacement in replacements.items():
+        text = text.replace(original, replacement)
+    return text
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='辞書置換の速度を比較します')
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    replacements = {}
+    while len(replacements) < args.entries:
+        replacements[random_word(rng)] = random_word(rng)
+    words = list(replacements)
+    messages = []
+    for _ in range(args.messages):
+        text = ''
+        while len(text) < args.length:
+            text += rng.choice(words) if rng.random() < 0.3 else random_word(rng)
+        messages.append(text)
+
+    start = time.perf_counter()
+    matcher = DictionaryMatcher(replacements)
+    build_time = time.perf_counter() - start
+    logger.info(f"辞書構築: {args.entries}件 {build_time * 1000:.2f}ms")
+
+    start = time.perf_counter()
+    for text in messages:
+        sequential_replace(replacements, text)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in messages:
+        matcher.replace(text)
+    matcher_time = time.perf_counter() - start
+
+    logger.info(f"str.replace: {sequential_time / args.messages * 1e6:10.2f}µs/メッセージ")
+    logger.info(f"DictionaryMatcher: {matcher_time / args.messages * 1e6:10.2f}µs/メッセージ")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import platform
+import random
+import struct
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from loguru import logger
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BotConfig, Config
+from stats import percentile
+
+PHRASES = [
+    'おはようございます', '今日の配信何時から？', 'それな', 'ちょっと待ってて', 'ご飯食べてくる',
+    'おつかれさまです！', 'マジか', 'これ見て', '了解です', 'ランクマ行きませんか', 'なるほどね'
+]
+
+def make_wav(seconds: float, sample_rate: int = 24000) -> bytes:
+    data = bytes(int(seconds * sample_rate) * 2)
+    return (
+        b'RIFF' + struct.pack('<I', 36 + len(data)) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b'data' + struct.pack('<I', len(data)) + data
+    )
+
+class StubEngine:
+    latency = 0.1
+    jitter = 0.05
+    wav = b''
+
+    def __init__(self, text: str, style_id: int, speed: float):
+        self.text = text
+
+    async def get_audio(self) -> bytes:
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        return self.wav
+
+class FakeVoiceClient:
+    def __init__(self, guild: 'FakeGuild', playback: float, recorder: 'Recorder'):
+        self.guild = guild
+        self.playback = playback
+        self.recorder = recorder
+        self.playing = None
+
+    def is_connected(self) -> bool:
+        return True
+
+    def is_playing(self) -> bool:
+        return self.playing is not None
+
+    def play(self, source, after) -> None:
+        self.recorder.played(self.guild.id)
+        self.playing = asyncio.get_running_loop().call_later(self.playback, self._finish, source, after)
+
+    def _finish(self, source, after) -> None:
+        self.playing = None
+        source.cleanup()
+        after(None)
+
+    def stop(self) -> None:
+        if self.playing is not None:
+            self.playing.cancel()
+            self.playing = None
+
+class FakeGuild:
+    def __init__(self, guild_id: int, playback: float, recorder: 'Recorder'):
+        self.id = guild_id
+        self.voice_client = FakeVoiceClient(self, playback, recorder)
+
+    def get_member(self, user_id: int):
+        return None
+
+    def get_channel(self, channel_id: int):
+        return None
+
+    def get_role(self, role_id: int):
+        return None
+
+class FakeAuthor:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.bot = False
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+class FakeMessage:
+    def __init__(self, guild: FakeGuild, author: FakeAuthor, channel: FakeChannel, content: str):
+        self.guild = guild
+        self.author = author
+        self.channel = channel
+        self.content = content
+
+class Recorder:
+    def __init__(self):
+        self.sent: Dict[int, deque] = {}
+        self.latencies: List[float] = []
+        self.first_sent = None
+        self.last_played = None
+
+    def sent_message(self, guild_id: int) -> None:
+        now = time.perf_counter()
+        if self.first_sent is None:
+            self.first_sent = now
+        self.sent.setdefault(guild_id, deque()).append(now)
+
+    def played(self, guild_id: int) -> None:
+        now = time.perf_counter()
+        self.latencies.append(now - self.sent[guild_id].popleft())
+        self.last_played = now
+
+async def monitor_lag(samples: List[float], interval: float = 0.01) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+async def run_step(vc, guilds: int, messages: int, interval: float, playback: float, timeout: float) -> Dict:
+    recorder = Recorder()
+    fake_guilds = [FakeGuild(1000 + i, playback, recorder) for i in range(guilds)]
+    vc.db.read_channels = {guild.id: (guild.id * 10, guild.id * 10 + 1) for guild in fake_guilds}
+
+    async def chat(guild: FakeGuild) -> None:
+        rng = random.Random(guild.id)
+        channel = FakeChannel(guild.id * 10 + 1)
+        await asyncio.sleep(rng.random() * interval)
+        for i in range(messages):
+            author = FakeAuthor(rng.randrange(10))
+            recorder.sent_message(guild.id)
+            await vc.read_message(FakeMessage(guild, author, channel, f"{rng.choice(PHRASES)}{i}"))
+            await asyncio.sleep(rng.expovariate(1 / interval))
+
+    lag: List[float] = []
+    lag_task = asyncio.create_task(monitor_lag(lag))
+    total = guilds * messages
+    try:
+        await asyncio.gather(*(chat(guild) for guild in fake_guilds))
+        deadline = time.perf_counter() + timeout
+        while len(recorder.latencies) < total and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+    finally:
+        lag_task.cancel()
+        for guild in fake_guilds:
+            await vc.stop_reading(guild.id)
+
+    played = len(recorder.latencies)
+    elapsed = (recorder.last_played or time.perf_counter()) - (recorder.first_sent or time.perf_counter())
+    return {
+        'guilds': guilds,
+        'messages': total,
+        'played': played,
+        'first_audio_latency': {
+            'p50': percentile(recorder.latencies, 0.5),
+            'p90': percentile(recorder.latencies, 0.9),
+            'p99': percentile(recorder.latencies, 0.99),
+            'max': max(recorder.latencies, default=0.0)
+        },
+        'messages_per_second': played / elapsed if elapsed > 0 else 0.0,
+        'event_loop_lag': {
+            'p50': percentile(lag, 0.5),
+            'p99': percentile(lag, 0.99),
+            'max': max(lag, default=0.0)
+        }
+    }
+
+async def run(args: argparse.Namespace) -> Dict:
+    defaults = BotConfig()
+    Config._snapshot = dataclasses.replace(
+        defaults,
+        debug=False,
+        cache=dataclasses.replace(defaults.cache, enabled=False),
+        reader=dataclasses.replace(defaults.reader, max_queue=0, coalesce_length=0),
+        session=dataclasses.replace(defaults.session, idle_timeout=0),
+        synthesis_service=dataclasses.replace(defaults.synthesis_service, enabled=False)
+    )
+
+    import vc
+    from readiness import Readiness
+
+    StubEngine.latency = args.latency
+    StubEngine.jitter = args.jitter
+    StubEngine.wav = make_wav(args.audio_length)
+    vc.voicevox = StubEngine
+
+    async def no_replacements(guild_id: int) -> Dict[str, str]:
+        return {}
+
+    async def no_voice_settings(guild_id: int, user_id: int) -> None:
+        return None
+
+    vc.db.get_dictionary_replacements = no_replacements
+    vc.db.get_voice_settings = no_voice_settings
+    for name in ('database', *vc.ENGINES):
+        Readiness.set_ready(name)
+
+    steps = []
+    for guilds in args.guilds:
+        result = await run_step(vc, guilds, args.messages, args.interval, args.audio_length, args.timeout)
+        latency = result['first_audio_latency']
+        logger.info(
+            f"サーバー数: {guilds:5d} - 初回音声まで p50: {latency['p50'] * 1000:8.1f}ms p99: {latency['p99'] * 1000:8.1f}ms, "
+            f"{result['messages_per_second']:8.1f}件/秒, ループ遅延 p99: {result['event_loop_lag']['p99'] * 1000:6.2f}ms "
+            f"({result['played']}/{result['messages']}件再生)"
+        )
+        steps.append(result)
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'messages': args.messages,
+            'interval': args.interval,
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'audio_length': args.audio_length
+        },
+        'steps': steps
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='読み上げ処理全体の遅延とスループットを計測します')
+    parser.add_argument('--guilds', type=lambda value: [int(i) for i in value.split(',')], default=[1, 10, 100, 1000])
+    parser.add_argument('--messages', type=int, default=20, help='サーバーごとのメッセージ数')
+    parser.add_argument('--interval', type=float, default=0.5, help='メッセージの平均送信間隔(秒)')
+    parser.add_argument('--latency', type=float, default=0.1, help='スタブエンジンの合成時間(秒)')
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--audio-length', type=float, default=0.3, help='合成音声の長さ(秒)')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', f"end_to_end-{datetime.now():%Y%m%d-%H%M%S}.json"))
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"結果を保存しました: {args.output}")
+
+if __name__ == '__main__':
+    main()
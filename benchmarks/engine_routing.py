@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter
+from aiohttp import web
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import VoicevoxSection
+from http_client import EngineRouter
+
+WAV = b'RIFF' + (36).to_bytes(4, 'little') + b'WAVEfmt ' + bytes(24) + b'data' + bytes(4)
+
+class StandInEngine:
+    def __init__(self, port: int, latency: float):
+        self.port = port
+        self.latency = latency
+        self.failing = False
+        self.served = 0
+        self.runner: web.AppRunner | None = None
+
+    async def version(self, request: web.Request) -> web.Response:
+        if self.failing:
+            return web.Response(status=503)
+        return web.json_response('0.0.0')
+
+    async def audio_query(self, request: web.Request) -> web.Response:
+        if self.failing:
+            return web.Response(status=503)
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        return web.json_response({'accent_phrases': [], 'speedScale': 1.0})
+
+    async def synthesis(self, request: web.Request) -> web.Response:
+        if self.failing:
+            return web.Response(status=503)
+        await request.json()
+        await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+        self.served += 1
+        return web.Response(body=WAV, content_type='audio/wav')
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/version', self.version)
+        app.router.add_post('/audio_query', self.audio_query)
+        app.router.add_post('/synthesis', self.synthesis)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', self.port).start()
+
+    async def stop(self) -> None:
+        await self.runner.cleanup()
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='複数のVOICEVOX engine互換サーバーへの振り分けを確認します')
+    parser.add_argument('--base-port', type=int, default=50131)
+    parser.add_argument('--latencies', type=float, nargs='+', default=[0.02, 0.02, 0.08])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--fail', type=int, default=0, help='途中で停止させるサーバーの番号 (1始まり, 0で無効)')
+    args = parser.parse_args()
+
+    engines = [StandInEngine(args.base_port + i, latency) for i, latency in enumerate(args.latencies)]
+    for engine in engines:
+        await engine.start()
+
+    urls = tuple(f"http://127.0.0.1:{engine.port}" for engine in engines)
+    router = EngineRouter(urls, VoicevoxSection(url=urls, max_concurrency=args.concurrency, health_check_interval=0.5))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    errors = Counter()
+    done = 0
+
+    async def one(i: int) -> None:
+        nonlocal done
+        async with semaphore:
+            try:
+                await router.synthesize(f"テスト{i}", 1, 1.0)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+            done += 1
+            if args.fail and done == args.requests // 3:
+                engines[args.fail - 1].failing = True
+                logger.info(f"{urls[args.fail - 1]} を停止しました")
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+    finally:
+        elapsed = time.perf_counter() - start
+        await router.close()
+        for engine in engines:
+            await engine.stop()
+
+    for engine, url in zip(engines, urls):
+        logger.info(f"{url} 遅延: {engine.latency * 1000:6.1f}ms 処理件数: {engine.served}")
+    logger.info(f"合計: {args.requests}件 エラー: {dict(errors) or 0} スループット: {args.requests / elapsed:.1f}件/秒")
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import VoicevoxSection
+from http_client import EngineClient
+from stats import percentile
+
+WAV = b'RIFF' + (36).to_bytes(4, 'little') + b'WAVEfmt ' + bytes(24) + b'data' + bytes(4)
+
+async def audio_query(request: web.Request) -> web.Response:
+    return web.json_response({'accent_phrases': [], 'speedScale': 1.0, 'kana': request.query.get('text', '')})
+
+async def synthesis(request: web.Request) -> web.Response:
+    await request.json()
+    return web.Response(body=WAV, content_type='audio/wav')
+
+async def start_server(port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_post('/audio_query', audio_query)
+    app.router.add_post('/synthesis', synthesis)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+async def per_request_session(url: str, text: str, speaker: int, speed: float) -> bytes:
+    async with aiohttp.ClientSession(url) as session:
+        json_response = await session.post('/audio_query', headers={'Content-Type': 'application/json'}, params={'text': text, 'speaker': speaker})
+        json_data = await json_response.json()
+        json_data['speedScale'] = speed
+        response = await session.post('/synthesis', headers={'Content-Type': 'application/json', 'Accept': 'audio/wav'}, params={'speaker': speaker}, json=json_data)
+        return await response.read()
+
+async def measure(name: str, request, requests: int, concurrency: int) -> None:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await request(f"テスト{i}", 1, 1.0)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"{name:<8} 並列数: {concurrency:>3} "
+        f"p50: {percentile(latencies, 0.5) * 1000:7.2f}ms "
+        f"p99: {percentile(latencies, 0.99) * 1000:7.2f}ms "
+        f"スループット: {requests / elapsed:8.1f}件/秒"
+    )
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='VOICEVOX engine互換サーバーに対するHTTPクライアントの速度を比較します')
+    parser.add_argument('--port', type=int, default=50121)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    runner = await start_server(args.port)
+    settings = VoicevoxSection(url=url, max_concurrency=max(args.concurrency))
+    client = EngineClient(url, settings.connect_timeout, settings.read_timeout, settings.max_connections, settings.max_concurrency)
+    try:
+        for concurrency in args.concurrency:
+            await measure('毎回接続', lambda *a: per_request_session(url, *a), args.requests, concurrency)
+            await measure('プール', client.synthesize, args.requests, concurrency)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dictionary import DictionaryMatcher
+from normalizer import NameCache, NormalizeContext, default_normalizer
+
+PHRASES = [
+    'おはようございます', '今日の配信何時から？', '草', 'それな', 'わかる〜', 'ちょっと待ってて',
+    'ご飯食べてくる', 'おつかれさまです！', 'マジか', 'これ見て', 'え、本当に？', '了解です',
+    'ランクマ行きませんか', '寝落ちしてた', 'www', 'なるほどね', 'いいね👍', '明日は仕事です。'
+]
+URLS = [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'https://x.com/user/status/1234567890123456789',
+    'https://discord.com/channels/123456789012345678/234567890123456789', 'http://example.com'
+]
+
+class FakeMember:
+    def __init__(self, display_name: str):
+        self.display_name = display_name
+
+class FakeNamed:
+    def __init__(self, name: str):
+        self.name = name
+
+class FakeGuild:
+    def __init__(self, rng: random.Random):
+        self.members = {rng.randrange(10 ** 17, 10 ** 18): FakeMember(f"ユーザー{i}") for i in range(50)}
+        self.channels = {rng.randrange(10 ** 17, 10 ** 18): FakeNamed(f"🎮雑談-{i}") for i in range(20)}
+        self.roles = {rng.randrange(10 ** 17, 10 ** 18): FakeNamed(f"ロール{i}") for i in range(10)}
+
+    def get_member(self, user_id: int) -> FakeMember | None:
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id: int) -> FakeNamed | None:
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id: int) -> FakeNamed | None:
+        return self.roles.get(role_id)
+
+def build_corpus(rng: random.Random, guild: FakeGuild, count: int) -> list:
+    members = list(guild.members)
+    channels = list(guild.channels)
+    roles = list(guild.roles)
+    corpus = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 6)):
+            roll = rng.random()
+            if roll < 0.55:
+                parts.append(rng.choice(PHRASES))
+            elif roll < 0.7:
+                parts.append(f"<@{rng.choice(members)}>")
+            elif roll < 0.78:
+                parts.append(f"<#{rng.choice(channels)}>")
+            elif roll < 0.82:
+                parts.append(f"<@&{rng.choice(roles)}>")
+            elif roll < 0.9:
+                parts.append(rng.choice(URLS))
+            else:
+                parts.append(f"<:emoji_{rng.randint(0, 99)}:{rng.randrange(10 ** 17, 10 ** 18)}>")
+        corpus.append(rng.choice((' ', '', '\n')).join(parts))
+    return corpus
+
+def legacy_normalize(text: str, guild: FakeGuild, matcher: DictionaryMatcher) -> str:
+    text = text.replace(' ', '')
+    text = matcher.replace(text)
+    for match in re.finditer(r'<@!?(\d+)>', text):
+        user = guild.get_member(int(match.group(1)))
+        if user:
+            text = text.replace(match.group(0), user.display_name)
+    for channel_id_str in re.findall(r'<#(\d+)>', text):
+        channel = guild.get_channel(int(channel_id_str))
+        if channel:
+            cleaned_channel_name = re.sub(r'[\U0001F300-\U0001F64F\U0001F680-\U0001F6FF\u2600-\u26FF\u2700-\u27BF]', '', channel.name)
+            text = text.replace(f'<#{channel_id_str}>', cleaned_channel_name)
+    text = re.sub(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+(?:\/[^\s]*)?', 'URL省略', text)
+    text = re.sub(r'<:[a-zA-Z0-9_]+:[0-9]+>', '', text)
+    return text
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='テキスト正規化の速度を比較します')
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    guild = FakeGuild(rng)
+    corpus = build_corpus(rng, guild, args.messages)
+    matcher = DictionaryMatcher({'草': 'くさ', 'www': 'わらわら', 'ランクマ': 'ランクマッチ', 'マジ': 'まじ', '配信': 'はいしん'})
+    names = NameCache(1024, 300.0)
+
+    legacy_best = normalizer_best = float('inf')
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        for text in corpus:
+            legacy_normalize(text, guild, matcher)
+        legacy_best = min(legacy_best, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for text in corpus:
+            default_normalizer.normalize(text, NormalizeContext(guild, names, matcher, strip_spaces=True))
+        normalizer_best = min(normalizer_best, time.perf_counter() - start)
+
+    logger.info(f"メッセージ数: {args.messages}, 平均長: {sum(map(len, corpus)) / len(corpus):.1f}文字")
+    logger.info(f"逐次置換: {legacy_best / args.messages * 1e6:10.2f}µs/メッセージ")
+    logger.info(f"Normalizer: {normalizer_best / args.messages * 1e6:10.2f}µs/メッセージ")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import re
+from typing import List
+
+_SENTENCE_END = re.compile(r'(?<=[。！？!?])|\n')
+_CLAUSE_END = re.compile(r'(?<=[、，,])')
+_PUNCTUATION = '。！？!?、，,'
+_PAUSE = '。'
+
+def _join(left: str, right: str) -> str:
+    if left.rstrip()[-1:] in ('', *_PUNCTUATION):
+        return left + right
+    return f"{left}{_PAUSE}{right}"
+
+def split_sentences(text: str, max_length: int) -> List[str]:
+    if max_length <= 0:
+        joined = ''
+        for line in text.split('\n'):
+            if line.strip():
+                joined = _join(joined, line)
+        return [joined] if joined else []
+
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        if len(sentence) > max_length:
+            pieces.extend(_CLAUSE_END.split(sentence))
+        else:
+            pieces.append(sentence)
+
+    chunks = []
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        if chunks and len(joined := _join(chunks[-1], piece)) <= max_length:
+            chunks[-1] = joined
+        else:
+            chunks.append(piece)
+    return chunks
@@ -1,7 +1,171 @@
 import yaml
 import os
-import aiofiles
-from typing import Dict, Any
+import asyncio
+from dataclasses import dataclass, field, fields, is_dataclass
+from loguru import logger
+from typing import Any, Dict, Tuple
+
+@dataclass(frozen=True, slots=True)
+class DiscordSection:
+    token: str = ''
+
+@dataclass(frozen=True, slots=True)
+class DatabaseSection:
+    connection: str = 'mysql'
+    host: str = 'localhost'
+    port: int = 3306
+    user: str = 'root'
+    password: str = ''
+    database: str = 'bot.db'
+    reconcile_interval: float = 0
+    read_connections: int = 2
+    write_batch_size: int = 100
+    write_batch_delay: float = 0.0
+    sqlite_synchronous: str = 'NORMAL'
+    sqlite_busy_timeout: float = 5.0
+    pool_minsize: int = 2
+    pool_maxsize: int = 10
+    pool_recycle: int = 3600
+
+@dataclass(frozen=True, slots=True)
+class EngineEnabledSection:
+    aquestalk1: bool = False
+    aquestalk2: bool = False
+    voicevox: bool = True
+    aivisspeech: bool = False
+
+@dataclass(frozen=True, slots=True)
+class VoicevoxEditionSection:
+    core: bool = True
+    engine: bool = False
+
+@dataclass(frozen=True, slots=True)
+class VoicevoxSection:
+    edition: VoicevoxEditionSection = field(default_factory=VoicevoxEditionSection)
+    max_loaded_models: int = 0
+    max_model_memory: int = 0
+    url: str | Tuple[str, ...] = 'http://localhost:50021'
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    max_connections: int = 16
+    max_concurrency: int = 4
+    health_check_interval: float = 10.0
+
+    @property
+    def urls(self) -> Tuple[str, ...]:
+        return (self.url,) if isinstance(self.url, str) else self.url
+
+@dataclass(frozen=True, slots=True)
+class AivisSpeechSection:
+    url: str | Tuple[str, ...] = 'http://localhost:10101'
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    max_connections: int = 16
+    max_concurrency: int = 4
+    health_check_interval: float = 10.0
+
+    @property
+    def urls(self) -> Tuple[str, ...]:
+        return (self.url,) if isinstance(self.url, str) else self.url
+
+@dataclass(frozen=True, slots=True)
+class AquesTalkSection:
+    workers: int = 4
+
+@dataclass(frozen=True, slots=True)
+class AqKanji2KoeSection:
+    workers: int = 2
+    cache_entries: int = 1024
+
+@dataclass(frozen=True, slots=True)
+class SynthesisServiceSection:
+    enabled: bool = False
+    workers: int = 2
+    buffer_size: int = 16 * 1024 * 1024
+
+@dataclass(frozen=True, slots=True)
+class CacheSection:
+    enabled: bool = True
+    memory_entries: int = 256
+    memory_size: int = 32 * 1024 * 1024
+    disk_path: str = 'cache'
+    disk_size: int = 512 * 1024 * 1024
+    voice_settings_entries: int = 4096
+
+@dataclass(frozen=True, slots=True)
+class ReaderSection:
+    lookahead: int = 2
+    chunk_length: int = 50
+    max_queue: int = 50
+    overflow_policy: str = 'drop_oldest'
+    coalesce_length: int = 40
+
+@dataclass(frozen=True, slots=True)
+class NormalizerSection:
+    name_cache_entries: int = 1024
+    name_ttl: float = 300.0
+
+@dataclass(frozen=True, slots=True)
+class SessionSection:
+    idle_timeout: float = 1800.0
+    eviction_interval: float = 60.0
+
+@dataclass(frozen=True, slots=True)
+class StartupSection:
+    connect_concurrency: int = 10
+
+@dataclass(frozen=True, slots=True)
+class ShardingSection:
+    shard_count: int = 0
+    processes: int = 1
+    restart_delay: float = 5.0
+
+@dataclass(frozen=True, slots=True)
+class MetricsSection:
+    enabled: bool = False
+    host: str = '127.0.0.1'
+    port: int = 9100
+
+@dataclass(frozen=True, slots=True)
+class TracingSection:
+    enabled: bool = False
+    sample_rate: float = 0.01
+    slow_threshold: float = 3.0
+    profile_max_seconds: int = 60
+
+@dataclass(frozen=True, slots=True)
+class BotConfig:
+    debug: bool = False
+    reload_interval: float = 5.0
+    discord: DiscordSection = field(default_factory=DiscordSection)
+    database: DatabaseSection = field(default_factory=DatabaseSection)
+    engine_enabled: EngineEnabledSection = field(default_factory=EngineEnabledSection)
+    voicevox: VoicevoxSection = field(default_factory=VoicevoxSection)
+    aivisspeech: AivisSpeechSection = field(default_factory=AivisSpeechSection)
+    aquestalk: AquesTalkSection = field(default_factory=AquesTalkSection)
+    aqkanji2koe: AqKanji2KoeSection = field(default_factory=AqKanji2KoeSection)
+    synthesis_service: SynthesisServiceSection = field(default_factory=SynthesisServiceSection)
+    cache: CacheSection = field(default_factory=CacheSection)
+    reader: ReaderSection = field(default_factory=ReaderSection)
+    normalizer: NormalizerSection = field(default_factory=NormalizerSection)
+    session: SessionSection = field(default_factory=SessionSection)
+    startup: StartupSection = field(default_factory=StartupSection)
+    sharding: ShardingSection = field(default_factory=ShardingSection)
+    metrics: MetricsSection = field(default_factory=MetricsSection)
+    tracing: TracingSection = field(default_factory=TracingSection)
+
+def _build_section(section_type: type, data: Dict[str, Any] | None) -> Any:
+    values = {}
+    for f in fields(section_type):
+        if data is None or f.name not in data:
+            continue
+        value = data[f.name]
+        if is_dataclass(f.type):
+            value = _build_section(f.type, value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        values[f.name] = value
+    return section_type(**values)
 
 class Config:
     _config_path = os.path.join(os.path.dirname(__file__), 'config.yaml')
@@ -9,27 +173,52 @@ class Config:
         'file_not_found': "設定ファイルが見つかりません: {}",
         'invalid_format': "設定ファイルの形式が正しくありません: {}"
     }
+    _snapshot: BotConfig | None = None
+    _mtime: float | None = None
+    _watcher: asyncio.Task | None = None
 
     @classmethod
     def _handle_config_errors(cls, error: Exception) -> None:
         if isinstance(error, FileNotFoundError):
             raise FileNotFoundError(cls._ERROR_MESSAGES['file_not_found'].format(cls._config_path))
-        if isinstance(error, yaml.YAMLError):
+        if isinstance(error, (yaml.YAMLError, TypeError, AttributeError)):
             raise ValueError(cls._ERROR_MESSAGES['invalid_format'].format(cls._config_path))
         raise error
 
     @classmethod
-    def load_config(cls) -> Dict[str, Any]:
+    def get(cls) -> BotConfig:
+        if cls._snapshot is None:
+            cls.reload()
+        return cls._snapshot
+
+    @classmethod
+    def reload(cls) -> BotConfig:
         try:
+            mtime = os.path.getmtime(cls._config_path)
             with open(cls._config_path, encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                snapshot = _build_section(BotConfig, yaml.safe_load(f))
         except Exception as e:
             cls._handle_config_errors(e)
+        cls._snapshot = snapshot
+        cls._mtime = mtime
+        return snapshot
 
     @classmethod
-    async def async_load_config(cls) -> Dict[str, Any]:
-        try:
-            async with aiofiles.open(cls._config_path, encoding='utf-8') as f:
-                return yaml.safe_load(await f.read())
-        except Exception as e:
-            cls._handle_config_errors(e)
+    async def watch(cls) -> None:
+        while True:
+            interval = cls.get().reload_interval
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+            try:
+                if os.path.getmtime(cls._config_path) == cls._mtime:
+                    continue
+                await asyncio.to_thread(cls.reload)
+                logger.info('設定ファイルを再読み込みしました')
+            except Exception as e:
+                logger.error(f"設定ファイルの再読み込みに失敗しました: {e}")
+
+    @classmethod
+    def start_watcher(cls) -> None:
+        if cls.get().reload_interval > 0 and (cls._watcher is None or cls._watcher.done()):
+            cls._watcher = asyncio.create_task(cls.watch())
@@ -0,0 +1,316 @@
+import asyncio
+import aiomysql
+import aiosqlite
+from collections import deque
+from config import DatabaseSection
+from loguru import logger
+from typing import Dict, List, Tuple
+
+class DatabaseBackend:
+    placeholder = '?'
+    schema: Tuple[str, ...] = ()
+    statements: Dict[str, str] = {}
+
+    def __init__(self, config: DatabaseSection):
+        self.config = config
+
+    def statement(self, name: str, repeat: int = 0) -> str:
+        sql = self.statements[name]
+        if repeat:
+            sql = sql.format(placeholders=', '.join([self.placeholder] * repeat))
+        return sql
+
+    async def connect(self) -> None:
+        raise NotImplementedError
+
+    async def fetchone(self, name: str, params: Tuple = (), repeat: int = 0) -> Tuple | None:
+        raise NotImplementedError
+
+    async def fetchall(self, name: str, params: Tuple = (), repeat: int = 0) -> List[Tuple]:
+        raise NotImplementedError
+
+    async def execute(self, name: str, params: Tuple = ()) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+class SQLiteBackend(DatabaseBackend):
+    placeholder = '?'
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS read_channels (
+            server_id INTEGER PRIMARY KEY,
+            voice_channel INTEGER NOT NULL,
+            chat_channel INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS autojoin (
+            server_id INTEGER PRIMARY KEY,
+            voice_channel INTEGER NOT NULL,
+            text_channel INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS voice_settings (
+            server_id INTEGER,
+            user_id INTEGER,
+            voice_name TEXT NOT NULL,
+            speed INTEGER NOT NULL DEFAULT 100,
+            engine TEXT NOT NULL DEFAULT 'voicevox',
+            PRIMARY KEY (server_id, user_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS dictionary_replacements (
+            server_id INTEGER NOT NULL,
+            original_text TEXT NOT NULL,
+            replacement_text TEXT NOT NULL,
+            PRIMARY KEY (server_id, original_text)
+        )
+        """
+    )
+    statements = {
+        'get_read_channels': "SELECT server_id, voice_channel, chat_channel FROM read_channels",
+        'get_read_channel': "SELECT voice_channel, chat_channel FROM read_channels WHERE server_id = ?",
+        'set_read_channel': "INSERT OR REPLACE INTO read_channels (server_id, voice_channel, chat_channel) VALUES (?, ?, ?)",
+        'remove_read_channel': "DELETE FROM read_channels WHERE server_id = ?",
+        'get_autojoin': "SELECT voice_channel, text_channel FROM autojoin WHERE server_id = ?",
+        'set_autojoin': "INSERT OR REPLACE INTO autojoin (server_id, voice_channel, text_channel) VALUES (?, ?, ?)",
+        'remove_autojoin': "DELETE FROM autojoin WHERE server_id = ?",
+        'get_voice_settings': "SELECT voice_name, speed, engine FROM voice_settings WHERE server_id = ? AND user_id = ?",
+        'get_voice_settings_bulk': "SELECT user_id, voice_name, speed, engine FROM voice_settings WHERE server_id = ? AND user_id IN ({placeholders})",
+        'set_voice_settings': "INSERT OR REPLACE INTO voice_settings (server_id, user_id, voice_name, speed, engine) VALUES (?, ?, ?, ?, ?)",
+        'get_dictionary_replacements': "SELECT original_text, replacement_text FROM dictionary_replacements WHERE server_id = ?",
+        'set_dictionary_replacement': "INSERT OR REPLACE INTO dictionary_replacements (server_id, original_text, replacement_text) VALUES (?, ?, ?)",
+        'remove_dictionary_replacement': "DELETE FROM dictionary_replacements WHERE server_id = ? AND original_text = ?"
+    }
+
+    def __init__(self, config: DatabaseSection):
+        super().__init__(config)
+        self.writer: aiosqlite.Connection | None = None
+        self.readers: deque = deque()
+        self.reader_slots: asyncio.Semaphore | None = None
+        self.reader_connections: List[aiosqlite.Connection] = []
+        self.writes: asyncio.Queue | None = None
+        self.write_task: asyncio.Task | None = None
+
+    async def _open(self) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.config.database, cached_statements=len(self.statements) * 4)
+        await connection.execute(f"PRAGMA busy_timeout = {int(self.config.sqlite_busy_timeout * 1000)}")
+        await connection.execute(f"PRAGMA synchronous = {self.config.sqlite_synchronous}")
+        return connection
+
+    async def connect(self) -> None:
+        self.writer = await self._open()
+        async with self.writer.execute('PRAGMA journal_mode = WAL') as cursor:
+            journal_mode = (await cursor.fetchone())[0]
+        if journal_mode.lower() != 'wal':
+            logger.warning(f"SQLiteをWALモードに設定できませんでした - journal_mode: {journal_mode}")
+        for sql in self.schema:
+            await self.writer.execute(sql)
+        await self.writer.commit()
+
+        read_connections = self.config.read_connections if journal_mode.lower() == 'wal' else 0
+        for _ in range(read_connections):
+            connection = await self._open()
+            await connection.execute('PRAGMA query_only = ON')
+            self.reader_connections.append(connection)
+            self.readers.append(connection)
+        self.reader_slots = asyncio.Semaphore(read_connections)
+
+        self.writes = asyncio.Queue()
+        self.write_task = asyncio.create_task(self._write_loop())
+
+    async def _read(self, sql: str, params: Tuple) -> List[Tuple]:
+        if not self.reader_connections:
+            return list(await self.writer.execute_fetchall(sql, params))
+        async with self.reader_slots:
+            connection = self.readers.popleft()
+            try:
+                return list(await connection.execute_fetchall(sql, params))
+            finally:
+                self.readers.append(connection)
+
+    async def fetchone(self, name: str, params: Tuple = (), repeat: int = 0) -> Tuple | None:
+        rows = await self._read(self.statement(name, repeat), params)
+        return rows[0] if rows else None
+
+    async def fetchall(self, name: str, params: Tuple = (), repeat: int = 0) -> List[Tuple]:
+        return await self._read(self.statement(name, repeat), params)
+
+    async def execute(self, name: str, params: Tuple = ()) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self.writes.put_nowait((self.statement(name), params, future))
+        await future
+
+    async def _write_loop(self) -> None:
+        closing = False
+        while not closing:
+            item = await self.writes.get()
+            if item is None:
+                return
+            batch = [item]
+            if self.config.write_batch_delay > 0:
+                await asyncio.sleep(self.config.write_batch_delay)
+            while len(batch) < self.config.write_batch_size and not self.writes.empty():
+                item = self.writes.get_nowait()
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"データベースへの書き込み処理でエラーが発生しました: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def _write_batch(self, batch: List[Tuple[str, Tuple, asyncio.Future]]) -> None:
+        applied = []
+        for sql, params, future in batch:
+            if future.done():
+                continue
+            try:
+                await self.writer.execute(sql, params)
+                applied.append(future)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+        try:
+            await self.writer.commit()
+        except Exception as e:
+            logger.error(f"データベースへの書き込みに失敗しました: {e}")
+            for future in applied:
+                if not future.done():
+                    future.set_exception(e)
+            try:
+                await self.writer.rollback()
+            except Exception as e:
+                logger.error(f"データベースのロールバックに失敗しました: {e}")
+            return
+        for future in applied:
+            if not future.done():
+                future.set_result(None)
+
+    async def close(self) -> None:
+        if self.write_task is not None:
+            self.writes.put_nowait(None)
+            await self.write_task
+            self.write_task = None
+        for connection in self.reader_connections:
+            await connection.close()
+        self.reader_connections = []
+        self.readers.clear()
+        if self.writer is not None:
+            await self.writer.close()
+            self.writer = None
+
+class MySQLBackend(DatabaseBackend):
+    placeholder = '%s'
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS read_channels (
+            server_id BIGINT PRIMARY KEY,
+            voice_channel BIGINT NOT NULL,
+            chat_channel BIGINT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS autojoin (
+            server_id BIGINT PRIMARY KEY,
+            voice_channel BIGINT NOT NULL,
+            text_channel BIGINT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS voice_settings (
+            server_id BIGINT,
+            user_id BIGINT,
+            voice_name VARCHAR(255) NOT NULL,
+            speed INT NOT NULL DEFAULT 100,
+            engine VARCHAR(50) NOT NULL DEFAULT 'voicevox',
+            PRIMARY KEY (server_id, user_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS dictionary_replacements (
+            server_id BIGINT NOT NULL,
+            original_text VARCHAR(255) NOT NULL,
+            replacement_text VARCHAR(255) NOT NULL,
+            PRIMARY KEY (server_id, original_text)
+        )
+        """
+    )
+    statements = {
+        'get_read_channels': "SELECT server_id, voice_channel, chat_channel FROM read_channels",
+        'get_read_channel': "SELECT voice_channel, chat_channel FROM read_channels WHERE server_id = %s",
+        'set_read_channel': "INSERT INTO read_channels (server_id, voice_channel, chat_channel) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE voice_channel = VALUES(voice_channel), chat_channel = VALUES(chat_channel)",
+        'remove_read_channel': "DELETE FROM read_channels WHERE server_id = %s",
+        'get_autojoin': "SELECT voice_channel, text_channel FROM autojoin WHERE server_id = %s",
+        'set_autojoin': "INSERT INTO autojoin (server_id, voice_channel, text_channel) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE voice_channel = VALUES(voice_channel), text_channel = VALUES(text_channel)",
+        'remove_autojoin': "DELETE FROM autojoin WHERE server_id = %s",
+        'get_voice_settings': "SELECT voice_name, speed, engine FROM voice_settings WHERE server_id = %s AND user_id = %s",
+        'get_voice_settings_bulk': "SELECT user_id, voice_name, speed, engine FROM voice_settings WHERE server_id = %s AND user_id IN ({placeholders})",
+        'set_voice_settings': "INSERT INTO voice_settings (server_id, user_id, voice_name, speed, engine) VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE voice_name = VALUES(voice_name), speed = VALUES(speed), engine = VALUES(engine)",
+        'get_dictionary_replacements': "SELECT original_text, replacement_text FROM dictionary_replacements WHERE server_id = %s",
+        'set_dictionary_replacement': "INSERT INTO dictionary_replacements (server_id, original_text, replacement_text) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE replacement_text = VALUES(replacement_text)",
+        'remove_dictionary_replacement': "DELETE FROM dictionary_replacements WHERE server_id = %s AND original_text = %s"
+    }
+
+    def __init__(self, config: DatabaseSection):
+        super().__init__(config)
+        self.pool: aiomysql.Pool | None = None
+
+    async def connect(self) -> None:
+        self.pool = await aiomysql.create_pool(
+            host=self.config.host,
+            user=self.config.user,
+            password=self.config.password,
+            db=self.config.database,
+            port=self.config.port,
+            minsize=self.config.pool_minsize,
+            maxsize=self.config.pool_maxsize,
+            pool_recycle=self.config.pool_recycle,
+            autocommit=True
+        )
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                for sql in self.schema:
+                    await cursor.execute(sql)
+
+    async def fetchone(self, name: str, params: Tuple = (), repeat: int = 0) -> Tuple | None:
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(self.statement(name, repeat), params)
+                return await cursor.fetchone()
+
+    async def fetchall(self, name: str, params: Tuple = (), repeat: int = 0) -> List[Tuple]:
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(self.statement(name, repeat), params)
+                return await cursor.fetchall()
+
+    async def execute(self, name: str, params: Tuple = ()) -> None:
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(self.statement(name), params)
+
+    async def close(self) -> None:
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'mysql': MySQLBackend
+}
+
+def create_backend(config: DatabaseSection) -> DatabaseBackend:
+    backend = BACKENDS.get(config.connection)
+    if backend is None:
+        raise ValueError(f"無効なデータベース接続方式: {config.connection}")
+    return backend(config)
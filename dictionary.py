@@ -0,0 +1,79 @@
+from collections import deque
+from typing import Dict, List
+
+class DictionaryMatcher:
+    __slots__ = ('goto', 'fail', 'output', 'dict_link', 'replacements', 'size')
+
+    def __init__(self, replacements: Dict[str, str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[str | None] = [None]
+        self.dict_link: List[int] = [0]
+        self.replacements = {original: replacement for original, replacement in replacements.items() if original}
+        self.size = len(self.replacements)
+
+        for original in self.replacements:
+            node = 0
+            for char in original:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.dict_link.append(0)
+                node = next_node
+            self.output[node] = original
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fail = self.goto[state].get(char, 0)
+                self.fail[child] = fail
+                self.dict_link[child] = fail if self.output[fail] is not None else self.dict_link[fail]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def replace(self, text: str) -> str:
+        if not self.size or not text:
+            return text
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        dict_link = self.dict_link
+        longest = [0] * len(text)
+        node = 0
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if output[node] is not None else dict_link[node]
+            while match:
+                length = len(output[match])
+                start = end - length + 1
+                if length > longest[start]:
+                    longest[start] = length
+                match = dict_link[match]
+
+        result = []
+        position = 0
+        plain_start = 0
+        while position < len(text):
+            length = longest[position]
+            if length:
+                result.append(text[plain_start:position])
+                result.append(self.replacements[text[position:position + length]])
+                position += length
+                plain_start = position
+            else:
+                position += 1
+        result.append(text[plain_start:])
+        return ''.join(result)
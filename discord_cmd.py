@@ -1,10 +1,13 @@
 import discord
+import io
 import json
+import profiler
 from discord import app_commands
 from database import Database
-from vc import update_voice_settings, message_queues, reading_tasks
+from vc import update_voice_settings, preload_voice_settings, stop_reading, invalidate_dictionary, skip_current
 from loguru import logger
-from config import Config
+from config import Config, BotConfig
+from readiness import Readiness
 from typing import Dict, List, Tuple
 
 db = Database()
@@ -25,9 +28,16 @@ def load_voice_characters() -> List[Dict]:
         return []
 
 async def ensure_db_connection():
-    if db.pool is None:
+    await Readiness.wait('database')
+    if db.backend is None:
         await db.connect()
 
+async def is_bot_owner(interaction: discord.Interaction) -> bool:
+    info = await interaction.client.application_info()
+    if info.team is not None:
+        return any(member.id == interaction.user.id for member in info.team.members)
+    return info.owner.id == interaction.user.id
+
 def setup_commands(tree: app_commands.CommandTree):
     @tree.command(name='join', description='ボイスチャンネルに参加')
     async def join(interaction: discord.Interaction):
@@ -43,6 +53,7 @@ def setup_commands(tree: app_commands.CommandTree):
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.green(), description=f"{voice_channel.name}に参加しました！このチャンネルのメッセージを読み上げます。"))
 
             await db.set_read_channel(interaction.guild_id, voice_channel.id, interaction.channel_id)
+            await preload_voice_settings(interaction.guild_id, voice_channel.members)
         except discord.ClientException:
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.red(), description='すでにボイスチャンネルに接続しています。'), ephemeral=True)
 
@@ -55,13 +66,7 @@ def setup_commands(tree: app_commands.CommandTree):
             return
 
         try:
-            if interaction.guild_id in message_queues:
-                await message_queues[interaction.guild_id].put(None)
-                if interaction.guild_id in reading_tasks and not reading_tasks[interaction.guild_id].done():
-                    await reading_tasks[interaction.guild_id]
-                if interaction.guild_id in reading_tasks:
-                    del reading_tasks[interaction.guild_id]
-                del message_queues[interaction.guild_id]
+            await stop_reading(interaction.guild_id)
             await interaction.guild.voice_client.disconnect()
             await db.remove_read_channel(interaction.guild_id)
 
@@ -152,7 +157,7 @@ def setup_commands(tree: app_commands.CommandTree):
                 await interaction.response.send_message(embed=discord.Embed(color=discord.Color.red(), description='VOICEVOX/AivisSpeechの速度は0.5から10の間で指定してください。'), ephemeral=True)
                 return
 
-        config = await Config.async_load_config()
+        config = Config.get()
 
         match engine:
             case 'aquestalk1':
@@ -220,9 +225,31 @@ def setup_commands(tree: app_commands.CommandTree):
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.dark_orange(), description='現在読み上げ中の音声はありません。'), ephemeral=True)
             return
 
+        skip_current(interaction.guild_id)
         voice_client.stop()
         await interaction.response.send_message(embed=discord.Embed(color=discord.Color.green(), description='読み上げを停止しました。'))
 
+    @tree.command(name='profile', description='指定した秒数だけプロファイルを取得します(管理者用)')
+    @app_commands.describe(seconds='計測する秒数')
+    @app_commands.default_permissions(administrator=True)
+    async def profile(interaction: discord.Interaction, seconds: app_commands.Range[int, 1, 600] = 10):
+        if not await is_bot_owner(interaction):
+            await interaction.response.send_message(embed=discord.Embed(color=discord.Color.red(), description='このコマンドはBOTの管理者のみ使用できます。'), ephemeral=True)
+            return
+
+        if profiler.is_running():
+            await interaction.response.send_message(embed=discord.Embed(color=discord.Color.dark_orange(), description='すでにプロファイルを取得中です。'), ephemeral=True)
+            return
+
+        seconds = min(seconds, Config.get().tracing.profile_max_seconds)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        summary, report = await profiler.profile(seconds)
+        await interaction.followup.send(
+            embed=discord.Embed(color=discord.Color.green(), title=f"{seconds}秒間のプロファイル結果", description=f"```\n{summary[:3900]}\n```"),
+            file=discord.File(io.BytesIO(report.encode('utf-8')), filename='profile.txt'),
+            ephemeral=True
+        )
+
     dict_group = app_commands.Group(name='dict', description='辞書機能の設定')
 
     @dict_group.command(name='add', description='単語の読み方を登録します')
@@ -232,6 +259,7 @@ def setup_commands(tree: app_commands.CommandTree):
 
         try:
             await db.set_dictionary_replacement(interaction.guild_id, word, to)
+            invalidate_dictionary(interaction.guild_id)
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.blue(), description=f"単語を登録しました。\n「{word}」→「{to}」"))
         except Exception as e:
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.red(), description=f"単語の登録に失敗しました: {str(e)}"), ephemeral=True)
@@ -267,14 +295,15 @@ def setup_commands(tree: app_commands.CommandTree):
                 return
 
             await db.remove_dictionary_replacement(interaction.guild_id, word)
+            invalidate_dictionary(interaction.guild_id)
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.purple(), description=f"単語「{word}」を削除しました。"))
         except Exception as e:
             await interaction.response.send_message(embed=discord.Embed(color=discord.Color.red(), description=f"単語の削除に失敗しました: {str(e)}"), ephemeral=True)
 
     tree.add_command(dict_group)
 
-def validate_voice_engine(engine: str, voice: str, config: Dict, voice_characters: Dict) -> Tuple[bool, str]:
-    if not config['engine_enabled'][engine]:
+def validate_voice_engine(engine: str, voice: str, config: BotConfig, voice_characters: Dict) -> Tuple[bool, str]:
+    if not getattr(config.engine_enabled, engine):
         return False, f'{engine}は無効になっています。'
     valid_voices = [v['value'] for v in voice_characters[engine_key[engine]]]
     if voice not in valid_voices:
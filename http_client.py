@@ -0,0 +1,184 @@
+import asyncio
+import aiohttp
+from loguru import logger
+from typing import Any, Dict, List, Set, Tuple
+
+class EngineError(Exception):
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+class EngineClient:
+    def __init__(self, base_url: str, connect_timeout: float, read_timeout: float, max_connections: int, max_concurrency: int):
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                self.base_url,
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            )
+        return self.session
+
+    @staticmethod
+    async def _error_detail(response: aiohttp.ClientResponse) -> str:
+        try:
+            return (await response.json())['detail'][0]['msg']
+        except Exception:
+            return f"HTTP {response.status}"
+
+    async def synthesize(self, text: str, speaker: int, speed: float) -> bytes:
+        async with self.semaphore:
+            session = self._get_session()
+            async with session.post(
+                '/audio_query',
+                headers={
+                    'Content-Type': 'application/json'
+                },
+                params={
+                    'text': text,
+                    'speaker': speaker
+                }
+            ) as response:
+                if response.status != 200:
+                    raise EngineError(f"audio_queryのリクエストに失敗しました: {await self._error_detail(response)}", response.status)
+                json_data: Dict[str, Any] = await response.json()
+
+            json_data['speedScale'] = speed
+            async with session.post(
+                '/synthesis',
+                headers={
+                    'Content-Type': 'application/json',
+                    'Accept': 'audio/wav'
+                },
+                params={
+                    'speaker': speaker
+                },
+                json=json_data
+            ) as response:
+                if response.status != 200:
+                    raise EngineError(f"synthesisのリクエストに失敗しました: {await self._error_detail(response)}", response.status)
+                return await response.read()
+
+    async def is_healthy(self) -> bool:
+        try:
+            async with self._get_session().get('/version', timeout=aiohttp.ClientTimeout(total=self.connect_timeout)) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+class Endpoint:
+    __slots__ = ('client', 'in_flight', 'healthy')
+
+    def __init__(self, client: EngineClient):
+        self.client = client
+        self.in_flight = 0
+        self.healthy = True
+
+class EngineRouter:
+    def __init__(self, urls: Tuple[str, ...], settings: Any):
+        self.endpoints = [
+            Endpoint(EngineClient(url, settings.connect_timeout, settings.read_timeout, settings.max_connections, settings.max_concurrency))
+            for url in urls
+        ]
+        self.health_check_interval = settings.health_check_interval
+        self.health_check_task: asyncio.Task | None = None
+        self.in_flight = 0
+        self.drained = asyncio.Event()
+        self.drained.set()
+
+    def _pick(self, tried: List[Endpoint]) -> Endpoint | None:
+        candidates = [e for e in self.endpoints if e not in tried]
+        healthy = [e for e in candidates if e.healthy]
+        if healthy:
+            candidates = healthy
+        if not candidates:
+            return None
+        return min(candidates, key=lambda e: e.in_flight)
+
+    def _start_health_check(self) -> None:
+        if self.health_check_interval > 0 and len(self.endpoints) > 1 and (self.health_check_task is None or self.health_check_task.done()):
+            self.health_check_task = asyncio.create_task(self._health_check())
+
+    async def _health_check(self) -> None:
+        while True:
+            results = await asyncio.gather(*(e.client.is_healthy() for e in self.endpoints))
+            for endpoint, healthy in zip(self.endpoints, results):
+                if healthy != endpoint.healthy:
+                    if healthy:
+                        logger.info(f"エンジンが復帰しました: {endpoint.client.base_url}")
+                    else:
+                        logger.warning(f"エンジンを振り分け対象から外しました: {endpoint.client.base_url}")
+                endpoint.healthy = healthy
+            await asyncio.sleep(self.health_check_interval)
+
+    async def synthesize(self, text: str, speaker: int, speed: float) -> bytes:
+        self._start_health_check()
+        tried = []
+        retried_server_error = False
+        last_error = None
+        while (endpoint := self._pick(tried)) is not None:
+            tried.append(endpoint)
+            endpoint.in_flight += 1
+            self.in_flight += 1
+            self.drained.clear()
+            try:
+                return await endpoint.client.synthesize(text, speaker, speed)
+            except EngineError as e:
+                if e.status < 500 or retried_server_error:
+                    raise
+                retried_server_error = True
+                last_error = e
+                logger.warning(f"エンジンがエラーを返したため別のエンジンで再試行します: {endpoint.client.base_url} - {e!r}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
+                endpoint.healthy = False
+                logger.warning(f"エンジンへのリクエストに失敗したため別のエンジンで再試行します: {endpoint.client.base_url} - {e!r}")
+            finally:
+                endpoint.in_flight -= 1
+                self.in_flight -= 1
+                if self.in_flight == 0:
+                    self.drained.set()
+        raise RuntimeError(f"利用可能なエンジンがありません: {last_error!r}")
+
+    async def close(self, drain: bool = False) -> None:
+        if self.health_check_task is not None:
+            self.health_check_task.cancel()
+        if drain:
+            await self.drained.wait()
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+
+_routers: Dict[type, Tuple[Any, EngineRouter]] = {}
+_retiring: Set[asyncio.Task] = set()
+
+def get_router(settings: Any) -> EngineRouter:
+    entry = _routers.get(type(settings))
+    if entry is not None and entry[0] == settings:
+        return entry[1]
+
+    router = EngineRouter(settings.urls, settings)
+    _routers[type(settings)] = (settings, router)
+    if entry is not None:
+        logger.info(f"エンジンの接続設定が変更されたため接続を作り直しました: {', '.join(settings.urls)}")
+        task = asyncio.create_task(entry[1].close(drain=True))
+        _retiring.add(task)
+        task.add_done_callback(_retiring.discard)
+    return router
+
+async def close_routers() -> None:
+    for _, router in _routers.values():
+        await router.close()
+    _routers.clear()
+    if _retiring:
+        await asyncio.gather(*_retiring, return_exceptions=True)
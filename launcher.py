@@ -0,0 +1,63 @@
+import aiohttp
+import asyncio
+import os
+import platform
+import signal
+import sys
+from config import Config
+from loguru import logger
+from sharding import shard_groups
+from typing import List
+
+async def recommended_shard_count(token: str) -> int:
+    async with aiohttp.ClientSession() as session:
+        async with session.get('https://discord.com/api/v10/gateway/bot', headers={'Authorization': f"Bot {token}"}) as response:
+            if response.status != 200:
+                raise RuntimeError(f"推奨シャード数の取得に失敗しました: HTTP {response.status}")
+            return (await response.json())['shards']
+
+async def run_shard_group(shard_ids: List[int], shard_count: int, stopping: asyncio.Event):
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    label = f"{shard_ids[0]}-{shard_ids[-1]}" if len(shard_ids) > 1 else str(shard_ids[0])
+    while not stopping.is_set():
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, main_path,
+            '--shard-ids', ','.join(map(str, shard_ids)),
+            '--shard-count', str(shard_count)
+        )
+        logger.info(f"シャード{label}のプロセスを起動しました (PID: {process.pid})")
+        wait = asyncio.create_task(process.wait())
+        stop = asyncio.create_task(stopping.wait())
+        await asyncio.wait((wait, stop), return_when=asyncio.FIRST_COMPLETED)
+        if stopping.is_set():
+            if process.returncode is None:
+                process.terminate()
+            await wait
+            return
+        stop.cancel()
+        restart_delay = Config.get().sharding.restart_delay
+        logger.error(f"シャード{label}のプロセスが終了しました (終了コード: {process.returncode}) - {restart_delay}秒後に再起動します")
+        try:
+            await asyncio.wait_for(stopping.wait(), restart_delay)
+        except asyncio.TimeoutError:
+            pass
+
+async def main():
+    config = Config.get()
+    shard_count = config.sharding.shard_count or await recommended_shard_count(config.discord.token)
+    groups = shard_groups(shard_count, config.sharding.processes)
+    logger.info(f"シャード数: {shard_count}, プロセス数: {len(groups)}")
+
+    stopping = asyncio.Event()
+    if platform.system().lower() != 'windows':
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+
+    await asyncio.gather(*(run_shard_group(group, shard_count, stopping) for group in groups))
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+class LRUCache:
+    def __init__(self, maxsize: int, maxweight: int = 0, weigher: Callable[[Any], int] | None = None):
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def _weigh(self, value: Any) -> int:
+        return self.weigher(value) if self.weigher else 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if key in self._data:
+            self.weight -= self._weigh(self._data.pop(key))
+
+        weight = self._weigh(value)
+        if self.maxsize <= 0 or (self.maxweight and weight > self.maxweight):
+            return
+
+        self._data[key] = value
+        self.weight += weight
+        while len(self._data) > self.maxsize or (self.maxweight and self.weight > self.maxweight):
+            _, evicted = self._data.popitem(last=False)
+            self.weight -= self._weigh(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        value = self._data.pop(key)
+        self.weight -= self._weigh(value)
+        return value
+
+    def remove_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.weight = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,81 +1,170 @@
+import asyncio
 import discord
 import platform
 import sys
+import time
 from discord import app_commands
 from discord_cmd import setup_commands
-from vc import read_message, db
+from vc import read_message, preload_voice_settings, stop_reading, invalidate_names, db, ENGINES
 from config import Config
 from loguru import logger
 from voicevox import voicevox
+from readiness import Readiness
+from synthesis_service import get_service, close_service
+from http_client import close_routers
+from text_to_speech import TextToSpeech
+from session import sessions
+from metrics import start_server as start_metrics_server
+from sharding import parse_shard_args, shard_for
+from typing import Awaitable
+
+class ShutdownMixin:
+    async def close(self) -> None:
+        if not self.is_closed():
+            await shutdown()
+        await super().close()
+
+class Client(ShutdownMixin, discord.Client):
+    pass
+
+class AutoShardedClient(ShutdownMixin, discord.AutoShardedClient):
+    pass
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.voice_states = True
-client = discord.Client(intents=intents)
+shard_ids, shard_count = parse_shard_args(sys.argv[1:])
+if shard_ids is not None or shard_count is not None:
+    client = AutoShardedClient(intents=intents, shard_ids=shard_ids, shard_count=shard_count)
+else:
+    client = Client(intents=intents)
 tree = app_commands.CommandTree(client)
-debug = Config.load_config()['debug']
 
-@client.event
-async def on_ready():
-    if debug:
-        logger.debug('デバッグモードが有効です')
-    logger.info(f"{client.user} としてログインしました")
-
-    await db.connect()
-    if debug:
-        logger.debug('データベース接続完了')
-
-    setup_commands(tree)
-    await tree.sync()
-    if debug:
-        logger.debug('コマンド同期完了')
-
-    read_channels = await db.get_read_channels()
-    if debug:
-        logger.debug('読み上げチャンネル一覧取得完了')
-    for guild_id, (voice_channel_id, _) in read_channels.items():
+async def timed(name: str, coro: Awaitable) -> None:
+    start = time.perf_counter()
+    try:
+        await coro
+        logger.info(f"{name}完了 - {time.perf_counter() - start:.2f}秒")
+    except Exception as e:
+        logger.error(f"{name}に失敗しました ({time.perf_counter() - start:.2f}秒): {e}")
+
+async def shutdown() -> None:
+    for session in sessions:
+        await stop_reading(session.guild_id)
+    for name, closing in (
+        ('音声合成ワーカー', close_service),
+        ('エンジンへの接続', close_routers),
+        ('AqKanji2Koe', lambda: asyncio.to_thread(TextToSpeech().close)),
+        ('データベース', db.close)
+    ):
+        try:
+            await closing()
+        except Exception as e:
+            logger.error(f"{name}の終了処理に失敗しました: {e}")
+    logger.info('終了処理完了')
+
+async def restore_guild(guild_id: int, voice_channel_id: int, semaphore: asyncio.Semaphore):
+    async with semaphore:
         guild = client.get_guild(guild_id)
         if not guild:
             await db.remove_read_channel(guild_id)
-            if debug:
+            if Config.get().debug:
                 logger.debug(f"{guild_id}のサーバーが見つかりませんでした")
-            continue
+            return
         voice_channel = guild.get_channel(voice_channel_id)
         if not voice_channel:
             await db.remove_read_channel(guild_id)
-            if debug:
+            if Config.get().debug:
                 logger.debug(f"{guild_id}のボイスチャンネルが見つかりませんでした")
-            continue
+            return
         member_count = len([m for m in voice_channel.members if not m.bot])
         if member_count == 0:
             await db.remove_read_channel(guild_id)
-            if debug:
+            if Config.get().debug:
                 logger.debug(f"{guild_id}のボイスチャンネルのメンバーはいないため読み上げチャンネルから削除しました")
-            continue
+            return
         if not guild.voice_client or not guild.voice_client.is_connected():
-            await voice_channel.connect(self_deaf=True)
-            if debug:
+            try:
+                await voice_channel.connect(self_deaf=True)
+            except Exception as e:
+                logger.error(f"{guild_id}のボイスチャンネルに接続できませんでした: {e}")
+                return
+            await preload_voice_settings(guild_id, voice_channel.members)
+            if Config.get().debug:
                 logger.debug(f"{guild_id}のボイスチャンネルに接続しました")
 
+def owns_guild(guild_id: int) -> bool:
+    if shard_ids is None or client.shard_count is None:
+        return True
+    return shard_for(guild_id, client.shard_count) in shard_ids
+
+async def restore_guilds():
+    read_channels = {guild_id: channels for guild_id, channels in db.read_channels.items() if owns_guild(guild_id)}
+    if Config.get().debug:
+        logger.debug('読み上げチャンネル一覧取得完了')
+    semaphore = asyncio.Semaphore(max(1, Config.get().startup.connect_concurrency))
+    await asyncio.gather(*(restore_guild(guild_id, voice_channel_id, semaphore) for guild_id, (voice_channel_id, _) in read_channels.items()))
+    logger.info(f"{len(read_channels)}件の読み上げチャンネルを確認しました")
+
+async def connect_database():
+    if not Readiness.is_ready('database'):
+        try:
+            await db.connect()
+        finally:
+            Readiness.set_ready('database')
+    await timed('サーバー再接続', restore_guilds())
+
+async def sync_commands():
+    if not Readiness.is_ready('commands'):
+        setup_commands(tree)
+        if shard_ids is None or 0 in shard_ids:
+            await tree.sync()
+        Readiness.set_ready('commands')
+
+async def warm_up_engines():
+    config = Config.get()
     try:
-        config = await Config.async_load_config()
-        if config['engine_enabled']['voicevox'] and config['voicevox']['edition']['core']:
+        if config.synthesis_service.enabled:
+            get_service().start()
+        elif config.engine_enabled.voicevox and config.voicevox.edition.core:
             await voicevox.init()
     except Exception as e:
         logger.error(f"voicevoxの初期化に失敗しました: {e}")
+    finally:
+        for engine in ENGINES:
+            Readiness.set_ready(engine)
+
+@client.event
+async def on_ready():
+    if Config.get().debug:
+        logger.debug('デバッグモードが有効です')
+    logger.info(f"{client.user} としてログインしました")
+    Config.start_watcher()
+    config = Config.get()
+    if config.metrics.enabled:
+        await start_metrics_server(config.metrics.host, config.metrics.port + (shard_ids[0] if shard_ids else 0))
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        timed('データベース接続', connect_database()),
+        timed('コマンド同期', sync_commands()),
+        timed('エンジン初期化', warm_up_engines())
+    )
+    logger.info(f"起動処理完了 - {time.perf_counter() - start:.2f}秒")
 
 @client.event
 async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
     if member.id == client.user.id:
         if before.channel is not None and after.channel is None:
+            await stop_reading(member.guild.id)
             await db.remove_read_channel(member.guild.id)
-            if debug:
+            if Config.get().debug:
                 logger.debug(f"{member.guild.id}の読み上げチャンネルを削除しました")
         if before.channel is not None and after.channel is not None and before.channel.id != after.channel.id:
             read_channel = await db.get_read_channel(member.guild.id)
             if read_channel:
                 await db.set_read_channel(member.guild.id, after.channel.id, read_channel[1])
-                if debug:
+                if Config.get().debug:
                     logger.debug(f"{member.guild.id}の読み上げチャンネルを更新しました")
         return
 
@@ -86,12 +175,13 @@ async def on_voice_state_update(member: discord.Member, before: discord.VoiceSta
             if member_count == 1 and member.guild.voice_client is None:
                 try:
                     await after.channel.connect(self_deaf=True)
+                    await preload_voice_settings(member.guild.id, after.channel.members)
                     await db.set_read_channel(member.guild.id, after.channel.id, autojoin[1])
                     _, chat_channel_id = await db.get_read_channel(member.guild.id)
                     chat_channel = member.guild.get_channel(chat_channel_id)
                     if chat_channel:
                         await chat_channel.send(embed=discord.Embed(color=discord.Color.dark_blue(), description='ユーザーが参加したためボイスチャンネルに接続しました'))
-                    if debug:
+                    if Config.get().debug:
                         logger.debug(f"{member.guild.id}の自動参加に成功しました")
                 except Exception as e:
                     logger.error(f"{member.guild.name}の自動参加に失敗しました: {e}")
@@ -99,7 +189,7 @@ async def on_voice_state_update(member: discord.Member, before: discord.VoiceSta
         voice_client = member.guild.voice_client
         if voice_client and voice_client.is_connected() and voice_client.channel == after.channel:
             await read_message(f"{member.display_name}が参加しました", member.guild, member, after.channel)
-            if debug:
+            if Config.get().debug:
                 logger.debug(f"{member.guild.id}に{member.display_name}が参加しました")
 
     if before.channel is not None and after.channel is None:
@@ -120,18 +210,30 @@ async def on_voice_state_update(member: discord.Member, before: discord.VoiceSta
         read_channel = await db.get_read_channel(voice_client.guild.id)
         if read_channel:
             _, chat_channel_id = read_channel
+            await stop_reading(voice_client.guild.id)
             await voice_client.disconnect()
             if chat_channel_id:
                 chat_channel = voice_client.guild.get_channel(chat_channel_id)
                 if chat_channel:
                     await chat_channel.send(embed=discord.Embed(color=discord.Color.dark_blue(), description='ボイスチャットからユーザーがいなくなったため退出しました'))
             await db.remove_read_channel(voice_client.guild.id)
-            if debug:
+            if Config.get().debug:
                 logger.debug(f"{voice_client.guild.id}のボイスチャンネルのメンバーはいないため読み上げチャンネルから切断しました")
         else:
             if voice_client.is_connected():
+                await stop_reading(voice_client.guild.id)
                 await voice_client.disconnect()
 
+@client.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    if before.name != after.name:
+        invalidate_names(after.guild.id)
+
+@client.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.name != after.name:
+        invalidate_names(after.guild.id)
+
 @client.event
 async def on_message(message):
     if message.author == client.user:
@@ -140,8 +242,9 @@ async def on_message(message):
     if len(message.content) > 0:
         await read_message(message)
 
-if platform.system().lower() not in ['windows', 'linux']:
-    logger.critical('サポートされていないオペレーティングシステムです')
-    sys.exit(1)
+if __name__ == '__main__':
+    if platform.system().lower() not in ['windows', 'linux']:
+        logger.critical('サポートされていないオペレーティングシステムです')
+        sys.exit(1)
 
-client.run(Config.load_config()['discord']['token'])
+    client.run(Config.get().discord.token)
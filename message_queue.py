@@ -0,0 +1,78 @@
+import asyncio
+import discord
+import time
+from config import Config
+from loguru import logger
+from tracing import Trace
+
+SUMMARY_TEXT = '以下省略'
+
+class QueuedMessage:
+    __slots__ = ('text', 'voice_name', 'speed', 'voice_client', 'engine', 'author_id', 'summary', 'received_at', 'enqueued_at', 'trace')
+
+    def __init__(self, text: str, voice_name: str, speed: int, voice_client: discord.VoiceClient, engine: str, author_id: int | None = None, summary: bool = False, received_at: float | None = None, trace: Trace | None = None):
+        self.text = text
+        self.voice_name = voice_name
+        self.speed = speed
+        self.voice_client = voice_client
+        self.engine = engine
+        self.author_id = author_id
+        self.summary = summary
+        self.enqueued_at = time.perf_counter()
+        self.received_at = received_at if received_at is not None else self.enqueued_at
+        self.trace = trace
+
+    def discard(self) -> None:
+        if self.trace is not None:
+            self.trace.discard()
+
+    def can_merge(self, other: 'QueuedMessage', max_length: int) -> bool:
+        return (
+            not self.summary
+            and self.author_id is not None
+            and self.author_id == other.author_id
+            and (self.voice_name, self.speed, self.engine) == (other.voice_name, other.speed, other.engine)
+            and len(self.text) + len(other.text) <= max_length
+        )
+
+class MessageQueue(asyncio.Queue):
+    def __init__(self):
+        super().__init__()
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def unfinished(self) -> int:
+        return self._unfinished_tasks
+
+    def offer(self, message: QueuedMessage) -> None:
+        config = Config.get().reader
+        tail = self._queue[-1] if self._queue else None
+
+        if tail is not None and config.coalesce_length > 0 and tail.can_merge(message, config.coalesce_length):
+            tail.text = f"{tail.text}\n{message.text}"
+            message.discard()
+            self.coalesced += 1
+            return
+
+        if config.max_queue <= 0 or self.qsize() < config.max_queue:
+            self.put_nowait(message)
+            return
+
+        self.dropped += 1
+        match config.overflow_policy:
+            case 'drop_oldest':
+                self._queue.popleft().discard()
+                self.task_done()
+                self.put_nowait(message)
+            case 'summarize':
+                message.discard()
+                if not tail.summary:
+                    self.put_nowait(QueuedMessage(SUMMARY_TEXT, message.voice_name, message.speed, message.voice_client, message.engine, summary=True))
+            case 'drop_newest':
+                message.discard()
+            case _:
+                message.discard()
+                logger.warning(f"無効なoverflow_policy: {config.overflow_policy}")
+        if Config.get().debug:
+            logger.debug(f"読み上げキューが上限に達しました - 破棄: {self.dropped}件, 結合: {self.coalesced}件")
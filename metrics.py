@@ -0,0 +1,131 @@
+import time
+from aiohttp import web
+from bisect import bisect_left
+from contextlib import contextmanager
+from loguru import logger
+from typing import Callable, Dict, Iterator, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = [[0] * len(self.buckets), 0.0, 0]
+            self.series[labels] = series
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Histogram | Gauge] = []
+
+    def register(self, metric: Histogram | Gauge) -> Histogram | Gauge:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"メトリクス {metric.name} の収集に失敗しました: {e}")
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram('yomiage_stage_seconds', '読み上げ処理の各段階の所要時間', ('stage',)))
+SYNTHESIS_SECONDS = registry.register(Histogram('yomiage_synthesis_seconds', 'エンジンごとの音声合成時間', ('engine',)))
+MESSAGE_TO_SPEECH_SECONDS = registry.register(Histogram('yomiage_message_to_speech_seconds', 'メッセージ受信から再生開始までの時間'))
+PLAYBACK_GAP_SECONDS = registry.register(Histogram('yomiage_playback_gap_seconds', '連続する発話の間の無音時間', buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+
+def register_gauge(name: str, documentation: str, labelnames: Tuple[str, ...], collect: Callable[[], Dict[Tuple[str, ...], float]]) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames, collect))
+
+class MetricsServer:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.runner: web.AppRunner | None = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self) -> None:
+        if self.runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        logger.info(f"メトリクスを公開しました: http://{self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+_server: MetricsServer | None = None
+
+async def start_server(host: str, port: int) -> None:
+    global _server
+    if _server is None:
+        _server = MetricsServer(host, port)
+    try:
+        await _server.start()
+    except OSError as e:
+        logger.error(f"メトリクスの公開に失敗しました: {e}")
@@ -0,0 +1,134 @@
+import discord
+import re
+import time
+from dictionary import DictionaryMatcher
+from lru import LRUCache
+from typing import Callable, List
+
+_EMOJI = re.compile(r'[\U0001F300-\U0001F64F\U0001F680-\U0001F6FF\u2600-\u26FF\u2700-\u27BF]')
+
+class NameCache:
+    __slots__ = ('entries', 'ttl')
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = LRUCache(maxsize)
+        self.ttl = ttl
+
+    def get(self, kind: str, object_id: int, resolve: Callable[[], str | None]) -> str | None:
+        key = (kind, object_id)
+        now = time.monotonic()
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        name = resolve()
+        if name is not None:
+            self.entries.put(key, (name, now + self.ttl))
+        return name
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+class NormalizeContext:
+    __slots__ = ('guild', 'names', 'matcher', 'strip_spaces')
+
+    def __init__(self, guild: discord.Guild, names: NameCache, matcher: DictionaryMatcher | None = None, strip_spaces: bool = False):
+        self.guild = guild
+        self.names = names
+        self.matcher = matcher
+        self.strip_spaces = strip_spaces
+
+class TokenStage:
+    name = ''
+    pattern = ''
+
+    def render(self, match: re.Match, context: NormalizeContext) -> str | None:
+        raise NotImplementedError
+
+class TextStage:
+    def apply(self, text: str, context: NormalizeContext) -> str:
+        raise NotImplementedError
+
+class MentionStage(TokenStage):
+    name = 'mention'
+    pattern = r'<@!?(?P<mention_id>\d+)>'
+
+    def render(self, match: re.Match, context: NormalizeContext) -> str | None:
+        user_id = int(match.group('mention_id'))
+        def resolve():
+            member = context.guild.get_member(user_id)
+            return member.display_name if member else None
+        return context.names.get('member', user_id, resolve)
+
+class RoleStage(TokenStage):
+    name = 'role'
+    pattern = r'<@&(?P<role_id>\d+)>'
+
+    def render(self, match: re.Match, context: NormalizeContext) -> str | None:
+        role_id = int(match.group('role_id'))
+        def resolve():
+            role = context.guild.get_role(role_id)
+            return role.name if role else None
+        return context.names.get('role', role_id, resolve)
+
+class ChannelStage(TokenStage):
+    name = 'channel'
+    pattern = r'<#(?P<channel_id>\d+)>'
+
+    def render(self, match: re.Match, context: NormalizeContext) -> str | None:
+        channel_id = int(match.group('channel_id'))
+        def resolve():
+            channel = context.guild.get_channel(channel_id)
+            return _EMOJI.sub('', channel.name) if channel else None
+        return context.names.get('channel', channel_id, resolve)
+
+class UrlStage(TokenStage):
+    name = 'url'
+    pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+(?:/[^\s]*)?'
+
+    def render(self, match: re.Match, context: NormalizeContext) -> str:
+        return 'URL省略'
+
+class CustomEmojiStage(TokenStage):
+    name = 'emoji'
+    pattern = r'<a?:[a-zA-Z0-9_]+:[0-9]+>'
+
+    def render(self, match: re.Match, context: NormalizeContext) -> str:
+        return ''
+
+class WhitespaceStage(TextStage):
+    def apply(self, text: str, context: NormalizeContext) -> str:
+        return text.replace(' ', '') if context.strip_spaces else text
+
+class DictionaryStage(TextStage):
+    def apply(self, text: str, context: NormalizeContext) -> str:
+        return context.matcher.replace(text) if context.matcher is not None else text
+
+class Normalizer:
+    def __init__(self, token_stages: List[TokenStage], text_stages: List[TextStage]):
+        self.token_stages = {stage.name: stage for stage in token_stages}
+        self.text_stages = text_stages
+        self.pattern = re.compile('|'.join(f"(?P<{stage.name}>{stage.pattern})" for stage in token_stages))
+
+    def _plain(self, text: str, context: NormalizeContext) -> str:
+        for stage in self.text_stages:
+            text = stage.apply(text, context)
+        return text
+
+    def normalize(self, text: str, context: NormalizeContext) -> str:
+        parts = []
+        position = 0
+        for match in self.pattern.finditer(text):
+            start = match.start()
+            if start > position:
+                parts.append(self._plain(text[position:start], context))
+            rendered = self.token_stages[match.lastgroup].render(match, context)
+            parts.append(match.group(0) if rendered is None else rendered)
+            position = match.end()
+        if position < len(text):
+            parts.append(self._plain(text[position:], context))
+        return ''.join(parts)
+
+default_normalizer = Normalizer(
+    [MentionStage(), RoleStage(), ChannelStage(), UrlStage(), CustomEmojiStage()],
+    [WhitespaceStage(), DictionaryStage()]
+)
@@ -0,0 +1,108 @@
+import asyncio
+import discord
+import time
+from collections import deque
+from config import Config
+from metrics import PLAYBACK_GAP_SECONDS, STAGE_SECONDS
+from loguru import logger
+from typing import Any, Callable, Dict
+
+class GapStats:
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, gap: float) -> None:
+        self.count += 1
+        self.total += gap
+        if gap > self.max:
+            self.max = gap
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'average': self.total / self.count if self.count else 0.0,
+            'max': self.max
+        }
+
+gap_stats = GapStats()
+
+class PlaybackController:
+    def __init__(self, voice_client: discord.VoiceClient):
+        self.voice_client = voice_client
+        self.loop = asyncio.get_running_loop()
+        self.pending = deque()
+        self.current = None
+        self.current_tag = None
+        self.last_end = None
+        self.started = None
+
+    def enqueue(self, source: discord.AudioSource, tag: Any = None, on_start: Callable[[float], None] | None = None) -> asyncio.Future:
+        future = self.loop.create_future()
+        self.pending.append((source, future, tag, time.perf_counter(), on_start))
+        if self.current is None:
+            self._advance()
+        return future
+
+    def _advance(self) -> None:
+        while self.pending:
+            source, future, tag, enqueued_at, on_start = self.pending.popleft()
+            if future.done():
+                source.cleanup()
+                continue
+            try:
+                self.voice_client.play(source, after=lambda error, future=future: self.loop.call_soon_threadsafe(self._finished, future, error))
+            except discord.ClientException as e:
+                logger.error(f"音声の再生に失敗しました: {e}")
+                source.cleanup()
+                future.set_result(None)
+                continue
+
+            now = time.perf_counter()
+            if on_start is not None:
+                on_start(now)
+            if self.last_end is not None:
+                gap = now - max(self.last_end, enqueued_at)
+                gap_stats.record(gap)
+                PLAYBACK_GAP_SECONDS.observe(gap)
+                if Config.get().debug:
+                    logger.debug(f"再生間隔: {gap * 1000:.2f}ms - {gap_stats.snapshot()}")
+            self.current = future
+            self.current_tag = tag
+            self.started = now
+            return
+
+    def _finished(self, future: asyncio.Future, error: Exception | None) -> None:
+        if error:
+            logger.error(f"音声の再生中にエラーが発生しました: {error}")
+        if not future.done():
+            future.set_result(None)
+        if self.current is future:
+            self.current = None
+            self.current_tag = None
+            self.last_end = time.perf_counter()
+            STAGE_SECONDS.observe(self.last_end - self.started, 'playback')
+            self._advance()
+
+    def drop(self, tag: Any) -> None:
+        kept = deque()
+        while self.pending:
+            entry = self.pending.popleft()
+            source, future, entry_tag, _, _ = entry
+            if entry_tag == tag:
+                source.cleanup()
+                if not future.done():
+                    future.set_result(None)
+            else:
+                kept.append(entry)
+        self.pending = kept
+
+    def close(self) -> None:
+        while self.pending:
+            source, future, _, _, _ = self.pending.popleft()
+            source.cleanup()
+            if not future.done():
+                future.set_result(None)
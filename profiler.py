@@ -0,0 +1,33 @@
+import asyncio
+import cProfile
+import io
+import pstats
+from loguru import logger
+from typing import Tuple
+
+_lock = asyncio.Lock()
+
+def is_running() -> bool:
+    return _lock.locked()
+
+async def profile(seconds: float, limit: int = 15) -> Tuple[str, str]:
+    async with _lock:
+        profiler = cProfile.Profile()
+        logger.info(f"プロファイルを開始しました - {seconds}秒間")
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        logger.info('プロファイルを終了しました')
+
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    lines = [f"{'tottime':>9} {'cumtime':>9} {'calls':>8}  関数"]
+    for (filename, line, function), (_, calls, tottime, cumtime, _) in rows[:limit]:
+        lines.append(f"{tottime:9.4f} {cumtime:9.4f} {calls:8d}  {pstats.func_std_string((filename, line, function))}")
+
+    report = io.StringIO()
+    stats.stream = report
+    stats.sort_stats('cumulative').print_stats()
+    return '\n'.join(lines), report.getvalue()
@@ -0,0 +1,27 @@
+import asyncio
+from typing import Dict
+
+class Readiness:
+    _events: Dict[str, asyncio.Event] = {}
+
+    @classmethod
+    def _event(cls, name: str) -> asyncio.Event:
+        event = cls._events.get(name)
+        if event is None:
+            event = asyncio.Event()
+            cls._events[name] = event
+        return event
+
+    @classmethod
+    def set_ready(cls, name: str) -> None:
+        cls._event(name).set()
+
+    @classmethod
+    def is_ready(cls, name: str) -> bool:
+        return cls._event(name).is_set()
+
+    @classmethod
+    async def wait(cls, name: str) -> None:
+        event = cls._event(name)
+        if not event.is_set():
+            await event.wait()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from config import Config
+from loguru import logger
+from lru import LRUCache
+from message_queue import MessageQueue
+from playback import PlaybackController
+from dictionary import DictionaryMatcher
+from normalizer import NameCache
+from typing import Dict, Iterator
+
+class GuildSession:
+    __slots__ = ('guild_id', 'queue', 'reader', 'controller', 'matcher', 'dictionary_generation', 'names', 'skipped_message', 'last_active')
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.queue = MessageQueue()
+        self.reader: asyncio.Task | None = None
+        self.controller: PlaybackController | None = None
+        self.matcher: DictionaryMatcher | None = None
+        self.dictionary_generation = 0
+        self.names = NameCache(Config.get().normalizer.name_cache_entries, Config.get().normalizer.name_ttl)
+        self.skipped_message = None
+        self.last_active = time.monotonic()
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def is_idle(self, timeout: float) -> bool:
+        return (
+            time.monotonic() - self.last_active > timeout
+            and self.queue.unfinished == 0
+            and (self.controller is None or (self.controller.current is None and not self.controller.pending))
+        )
+
+    async def close(self) -> None:
+        if self.reader is not None and not self.reader.done():
+            self.reader.cancel()
+            try:
+                await self.reader
+            except asyncio.CancelledError:
+                pass
+        self.reader = None
+        if self.controller is not None:
+            self.controller.close()
+            self.controller = None
+
+class SessionRegistry:
+    def __init__(self):
+        self.sessions: Dict[int, GuildSession] = {}
+        self.evictor: asyncio.Task | None = None
+        self.voice_settings = LRUCache(Config.get().cache.voice_settings_entries)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __iter__(self) -> Iterator[GuildSession]:
+        return iter(list(self.sessions.values()))
+
+    def get(self, guild_id: int) -> GuildSession | None:
+        return self.sessions.get(guild_id)
+
+    def get_or_create(self, guild_id: int) -> GuildSession:
+        session = self.sessions.get(guild_id)
+        if session is None:
+            session = GuildSession(guild_id)
+            self.sessions[guild_id] = session
+            self._start_evictor()
+            if Config.get().debug:
+                logger.debug(f"{guild_id}のセッションを作成しました - 稼働中: {len(self.sessions)}件")
+        return session
+
+    async def close(self, guild_id: int) -> None:
+        session = self.sessions.pop(guild_id, None)
+        self.voice_settings.remove_if(lambda key: key[0] == guild_id)
+        if session is not None:
+            await session.close()
+            if Config.get().debug:
+                logger.debug(f"{guild_id}のセッションを終了しました - 稼働中: {len(self.sessions)}件")
+
+    def _start_evictor(self) -> None:
+        if Config.get().session.eviction_interval > 0 and (self.evictor is None or self.evictor.done()):
+            self.evictor = asyncio.create_task(self._evict_idle())
+
+    async def _evict_idle(self) -> None:
+        while True:
+            config = Config.get().session
+            if config.eviction_interval <= 0:
+                return
+            await asyncio.sleep(config.eviction_interval)
+            if config.idle_timeout <= 0:
+                continue
+            for session in self:
+                if session.is_idle(config.idle_timeout) and self.sessions.get(session.guild_id) is session:
+                    await self.close(session.guild_id)
+                    if Config.get().debug:
+                        logger.debug(f"{session.guild_id}のセッションを一定時間操作がなかったため解放しました")
+
+sessions = SessionRegistry()
@@ -0,0 +1,23 @@
+import argparse
+from typing import List, Tuple
+
+def parse_shard_args(argv: List[str]) -> Tuple[List[int] | None, int | None]:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--shard-ids', type=lambda value: [int(i) for i in value.split(',') if i])
+    parser.add_argument('--shard-count', type=int)
+    args, _ = parser.parse_known_args(argv)
+    return args.shard_ids, args.shard_count
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+def shard_groups(shard_count: int, processes: int) -> List[List[int]]:
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    groups = []
+    start = 0
+    for i in range(processes):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
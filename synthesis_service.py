@@ -0,0 +1,238 @@
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from pathlib import Path
+from config import Config
+from loguru import logger
+from typing import Any, Dict, List, Tuple
+
+class CoreSynthesizer:
+    def __init__(self):
+        from voicevox import VoicevoxConfig
+        from voicevox_core.blocking import Onnxruntime, OpenJtalk, Synthesizer, VoiceModelFile
+
+        paths = VoicevoxConfig.get_default_config()
+        self.model_file_type = VoiceModelFile
+        self.synthesizer = Synthesizer(Onnxruntime.load_once(filename=paths['onnxruntime_path']), OpenJtalk(paths['dict_dir']))
+        self.style_models: Dict[int, Path] = {}
+        self.model_ids: Dict[Path, Any] = {}
+        self.loaded_models: OrderedDict = OrderedDict()
+
+        for model_file in sorted(Path(paths['vvm_path']).glob('*.vvm')):
+            try:
+                with VoiceModelFile.open(model_file) as model:
+                    self.model_ids[model_file] = model.id
+                    for character in model.metas:
+                        for style in character.styles:
+                            self.style_models.setdefault(style.id, model_file)
+            except Exception as e:
+                logger.error(f"モデル {model_file.name} の読み込みに失敗しました: {e}")
+
+    def _ensure_model(self, style_id: int) -> None:
+        model_file = self.style_models.get(style_id)
+        if model_file is None:
+            raise RuntimeError(f"スタイルID {style_id} のモデルが見つかりません")
+
+        if model_file not in self.loaded_models:
+            with self.model_file_type.open(model_file) as model:
+                self.synthesizer.load_voice_model(model)
+            self.loaded_models[model_file] = model_file.stat().st_size
+        self.loaded_models.move_to_end(model_file)
+
+        config = Config.get().voicevox
+        while len(self.loaded_models) > 1 and (
+            (config.max_loaded_models > 0 and len(self.loaded_models) > config.max_loaded_models)
+            or (config.max_model_memory > 0 and sum(self.loaded_models.values()) > config.max_model_memory)
+        ):
+            evicted, _ = self.loaded_models.popitem(last=False)
+            self.synthesizer.unload_voice_model(self.model_ids[evicted])
+
+    def synthesize(self, text: str, style_id: int, speed: float) -> bytes:
+        self._ensure_model(style_id)
+        audio_query = self.synthesizer.create_audio_query(text, style_id)
+        audio_query.speed_scale = speed
+        return self.synthesizer.synthesis(audio_query, style_id)
+
+def _synthesize(engines: Dict[str, Any], engine: str, args: Tuple) -> bytes:
+    match engine:
+        case 'voicevox':
+            if 'voicevox' not in engines:
+                engines['voicevox'] = CoreSynthesizer()
+            return engines['voicevox'].synthesize(*args)
+        case 'aquestalk1':
+            from aquestalk import synthesize_aquestalk1
+            return synthesize_aquestalk1(*args)
+        case 'aquestalk2':
+            from aquestalk import synthesize_aquestalk2
+            return synthesize_aquestalk2(*args)
+        case _:
+            raise ValueError(f"無効なエンジン: {engine}")
+
+def _worker_main(conn: Connection, memory_name: str) -> None:
+    memory = shared_memory.SharedMemory(name=memory_name)
+
+    engines: Dict[str, Any] = {}
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                return
+            if request is None:
+                return
+
+            engine, args = request
+            try:
+                wav = _synthesize(engines, engine, args)
+            except Exception as e:
+                conn.send(('error', str(e)))
+                continue
+
+            if len(wav) <= memory.size:
+                memory.buf[:len(wav)] = wav
+                conn.send(('memory', len(wav)))
+            else:
+                conn.send(('bytes', bytes(wav)))
+    finally:
+        memory.close()
+
+def handles(engine: str) -> bool:
+    config = Config.get()
+    if not config.synthesis_service.enabled:
+        return False
+    return engine in ('aquestalk1', 'aquestalk2') or (engine == 'voicevox' and config.voicevox.edition.core)
+
+class WorkerHandle:
+    __slots__ = ('index', 'memory', 'executor', 'process', 'conn', 'queue', 'depth', 'restarts', 'task')
+
+    def __init__(self, index: int, buffer_size: int):
+        self.index = index
+        self.memory = shared_memory.SharedMemory(create=True, size=buffer_size)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"synthesis-{index}")
+        self.process = None
+        self.conn = None
+        self.queue = asyncio.Queue()
+        self.depth = 0
+        self.restarts = 0
+        self.task = None
+
+class SynthesisService:
+    def __init__(self, workers: int, buffer_size: int):
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = [WorkerHandle(i, max(1, buffer_size)) for i in range(max(1, workers))]
+
+    def start(self) -> None:
+        for handle in self.workers:
+            if handle.process is None:
+                self._spawn(handle)
+            if handle.task is None or handle.task.done():
+                handle.task = asyncio.create_task(self._drive(handle))
+
+    def _spawn(self, handle: WorkerHandle) -> None:
+        parent_conn, child_conn = self.context.Pipe()
+        handle.process = self.context.Process(
+            target=_worker_main,
+            args=(child_conn, handle.memory.name),
+            name=f"synthesis-{handle.index}",
+            daemon=True
+        )
+        handle.process.start()
+        child_conn.close()
+        handle.conn = parent_conn
+        logger.info(f"音声合成ワーカー{handle.index}を起動しました (PID: {handle.process.pid})")
+
+    def _restart(self, handle: WorkerHandle) -> None:
+        handle.conn.close()
+        if handle.process.is_alive():
+            handle.process.kill()
+        handle.process.join()
+        handle.restarts += 1
+        self._spawn(handle)
+
+    @staticmethod
+    def _roundtrip(handle: WorkerHandle, request: Tuple) -> Tuple[str, Any]:
+        handle.conn.send(request)
+        return handle.conn.recv()
+
+    async def _drive(self, handle: WorkerHandle) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request, future = await handle.queue.get()
+            if future.done():
+                continue
+            try:
+                kind, payload = await loop.run_in_executor(handle.executor, self._roundtrip, handle, request)
+            except (EOFError, OSError) as e:
+                logger.error(f"音声合成ワーカー{handle.index}が停止したため再起動します: {e!r}")
+                self._restart(handle)
+                if not future.done():
+                    future.set_exception(RuntimeError(f"音声合成ワーカー{handle.index}が停止しました"))
+                continue
+
+            if future.done():
+                continue
+            match kind:
+                case 'memory':
+                    future.set_result(bytes(handle.memory.buf[:payload]))
+                case 'bytes':
+                    future.set_result(payload)
+                case _:
+                    future.set_exception(RuntimeError(payload))
+
+    async def synthesize(self, engine: str, args: Tuple) -> bytes:
+        self.start()
+        handle = min(self.workers, key=lambda w: w.depth)
+        future = asyncio.get_running_loop().create_future()
+        handle.depth += 1
+        handle.queue.put_nowait(((engine, args), future))
+        try:
+            return await future
+        finally:
+            handle.depth -= 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                'worker': handle.index,
+                'pid': handle.process.pid if handle.process else None,
+                'alive': handle.process is not None and handle.process.is_alive(),
+                'depth': handle.depth,
+                'restarts': handle.restarts
+            }
+            for handle in self.workers
+        ]
+
+    async def close(self) -> None:
+        for handle in self.workers:
+            if handle.task is not None:
+                handle.task.cancel()
+            if handle.process is not None:
+                try:
+                    handle.conn.send(None)
+                except OSError:
+                    pass
+                await asyncio.to_thread(handle.process.join, 5)
+                if handle.process.is_alive():
+                    handle.process.kill()
+                handle.conn.close()
+            handle.executor.shutdown(wait=False)
+            handle.memory.close()
+            handle.memory.unlink()
+
+_service: SynthesisService | None = None
+
+def get_service() -> SynthesisService:
+    global _service
+    if _service is None:
+        config = Config.get().synthesis_service
+        _service = SynthesisService(config.workers, config.buffer_size)
+    return _service
+
+async def close_service() -> None:
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
@@ -1,54 +1,109 @@
+import asyncio
 import ctypes
 import os
 import platform
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from lru import LRUCache
+from typing import Callable
+
+ERROR_BUFFER_TOO_SMALL = 105
+
+class Kanji2KoeWorker:
+    def __init__(self, library: ctypes.CDLL, convert: Callable[..., int], dic_dir: str, index: int):
+        self.library = library
+        self.convert_func = convert
+        self.dic_dir = dic_dir
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"aqkanji2koe-{index}")
+        self.instance = None
+        self.pending = 0
+
+    def _create(self) -> None:
+        err_code = ctypes.c_int(0)
+        instance = self.library.AqKanji2Koe_Create(self.dic_dir.encode('utf-8'), ctypes.byref(err_code))
+        if not instance:
+            raise Exception(f"AqKanji2Koeインスタンスの作成に失敗しました (エラーコード: {err_code.value})")
+        self.instance = instance
+
+    def convert(self, text: str) -> str:
+        if self.instance is None:
+            self._create()
+
+        encoded = text.encode('utf-8')
+        size = max(4096, len(encoded) * 4)
+        for _ in range(4):
+            output_buffer = ctypes.create_string_buffer(size)
+            result = self.convert_func(self.instance, encoded, output_buffer, size)
+            if result == 0:
+                return output_buffer.value.decode('utf-8')
+            if result != ERROR_BUFFER_TOO_SMALL:
+                break
+            size *= 2
+        raise Exception(f"変換に失敗しました。エラーコード: {result}")
+
+    def release(self) -> None:
+        if self.instance is not None:
+            try:
+                self.library.AqKanji2Koe_Release(ctypes.c_void_p(self.instance))
+            except Exception as e:
+                raise Exception(f"開放時にエラーが発生しました: {e}")
+            finally:
+                self.instance = None
+
+    def close(self) -> None:
+        self.executor.submit(self.release)
+        self.executor.shutdown(wait=True)
 
 class TextToSpeech:
-    def __init__(self, text: str):
-        self.text = text
-        self.system = platform.system().lower()
-        self.dll_dir = os.path.join(os.path.dirname(__file__), 'AqKanji2Koe', 'lib')
-        self.dic_dir = os.path.join(os.path.dirname(__file__), 'AqKanji2Koe', 'aq_dic')
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TextToSpeech, cls).__new__(cls)
+            cls._instance.system = platform.system().lower()
+            cls._instance.dll_dir = os.path.join(os.path.dirname(__file__), 'AqKanji2Koe', 'lib')
+            cls._instance.dic_dir = os.path.join(os.path.dirname(__file__), 'AqKanji2Koe', 'aq_dic')
+            cls._instance.workers = []
+            cls._instance.cache = LRUCache(Config.get().aqkanji2koe.cache_entries)
+        return cls._instance
 
+    def _load(self) -> None:
         match self.system:
             case 'windows':
                 path = os.path.join(self.dll_dir, 'AqKanji2Koe.dll')
             case 'linux':
                 path = os.path.join(self.dll_dir, 'libAqKanji2Koe.so')
 
-        self.aq_kanji2koe = ctypes.CDLL(path)
+        aq_kanji2koe = ctypes.CDLL(path)
+        aq_kanji2koe.AqKanji2Koe_Create.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.c_int)]
+        aq_kanji2koe.AqKanji2Koe_Create.restype = ctypes.c_void_p
+        aq_kanji2koe.AqKanji2Koe_Release.argtypes = [ctypes.c_void_p]
+        aq_kanji2koe.AqKanji2Koe_Release.restype = None
+        convert = aq_kanji2koe.AqKanji2Koe_Convert_utf8 if self.system == 'windows' else aq_kanji2koe.AqKanji2Koe_Convert
+        convert.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        convert.restype = ctypes.c_int
 
-    def convert_text_to_speech(self) -> str:
-        self.aq_kanji2koe.AqKanji2Koe_Create.argtypes = [ctypes.c_char_p, ctypes.POINTER(ctypes.c_int)]
-        self.aq_kanji2koe.AqKanji2Koe_Create.restype = ctypes.c_void_p
+        self.workers = [Kanji2KoeWorker(aq_kanji2koe, convert, self.dic_dir, i) for i in range(max(1, Config.get().aqkanji2koe.workers))]
 
-        err_code = ctypes.c_int(0)
-        instance = self.aq_kanji2koe.AqKanji2Koe_Create(self.dic_dir.encode('utf-8'), ctypes.byref(err_code))
-        if not instance:
-            raise Exception(f"AqKanji2Koeインスタンスの作成に失敗しました (エラーコード: {err_code.value})")
+    async def convert(self, text: str) -> str:
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached
+
+        if not self.workers:
+            self._load()
 
+        worker = min(self.workers, key=lambda w: w.pending)
+        worker.pending += 1
         try:
-            if self.system == 'windows':
-                self.aq_kanji2koe.AqKanji2Koe_Convert_utf8.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
-                self.aq_kanji2koe.AqKanji2Koe_Convert_utf8.restype = ctypes.c_int
-                output_buffer = ctypes.create_string_buffer(4096)
-                result = self.aq_kanji2koe.AqKanji2Koe_Convert_utf8(instance, self.text.encode('utf-8'), output_buffer, 4096)
-                if result == 0:
-                    return output_buffer.value.decode('utf-8')
-                else:
-                    raise Exception(f"変換に失敗しました。エラーコード: {result}")
-            elif self.system == 'linux':
-                self.aq_kanji2koe.AqKanji2Koe_Convert.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
-                self.aq_kanji2koe.AqKanji2Koe_Convert.restype = ctypes.c_int
-                output_buffer = ctypes.create_string_buffer(4096)
-                result = self.aq_kanji2koe.AqKanji2Koe_Convert(instance, self.text.encode('utf-8'), output_buffer, 4096)
-                if result == 0:
-                    return output_buffer.value.decode('utf-8')
-                else:
-                    raise Exception(f"変換に失敗しました。エラーコード: {result}")
+            result = await asyncio.get_running_loop().run_in_executor(worker.executor, worker.convert, text)
         finally:
-            if instance:
-                try:
-                    instance_ptr = ctypes.c_void_p(instance)
-                    self.aq_kanji2koe.AqKanji2Koe_Release(instance_ptr)
-                except Exception as e:
-                    raise Exception(f"開放時にエラーが発生しました: {e}")
+            worker.pending -= 1
+
+        self.cache.put(text, result)
+        return result
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
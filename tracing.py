@@ -0,0 +1,76 @@
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from config import Config
+from loguru import logger
+from metrics import Histogram
+from typing import Iterator, List, Tuple
+
+_trace_ids = itertools.count(1)
+
+class Trace:
+    __slots__ = ('trace_id', 'guild_id', 'start', 'sampled', 'spans', 'audio_started', 'finished')
+
+    def __init__(self, guild_id: int, start: float, sampled: bool):
+        self.trace_id = next(_trace_ids)
+        self.guild_id = guild_id
+        self.start = start
+        self.sampled = sampled
+        self.spans: List[Tuple[str, float, float]] = []
+        self.audio_started: float | None = None
+        self.finished = False
+
+    def add(self, name: str, start: float, end: float) -> None:
+        self.spans.append((name, start - self.start, end - start))
+
+    def mark_audio_start(self, now: float) -> None:
+        if self.audio_started is None:
+            self.audio_started = now
+            self.add('first_audio', self.start, now)
+
+    def discard(self) -> None:
+        self.finished = True
+
+    def finish(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        now = time.perf_counter()
+        if self.audio_started is not None:
+            self.add('playback', self.audio_started, now)
+        total = now - self.start
+        config = Config.get().tracing
+        slow = 0 < config.slow_threshold <= total
+        if not slow and not self.sampled:
+            return
+        detail = ', '.join(f"{name} +{offset * 1000:.1f}ms {duration * 1000:.1f}ms" for name, offset, duration in self.spans)
+        if slow:
+            logger.warning(f"読み上げに時間がかかりました [{self.trace_id}] {self.guild_id} - 合計: {total * 1000:.1f}ms ({detail})")
+        else:
+            logger.info(f"トレース [{self.trace_id}] {self.guild_id} - 合計: {total * 1000:.1f}ms ({detail})")
+
+current_trace: ContextVar[Trace | None] = ContextVar('current_trace', default=None)
+
+def start_trace(guild_id: int, start: float | None = None) -> Trace | None:
+    config = Config.get().tracing
+    if not config.enabled:
+        current_trace.set(None)
+        return None
+    trace = Trace(guild_id, start if start is not None else time.perf_counter(), random.random() < config.sample_rate)
+    current_trace.set(trace)
+    return trace
+
+@contextmanager
+def span(name: str, histogram: Histogram | None = None, label: str | None = None) -> Iterator[None]:
+    trace = current_trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        if histogram is not None:
+            histogram.observe(end - start, label or name)
+        if trace is not None:
+            trace.add(name, start, end)
@@ -1,9 +1,9 @@
-import os
 import discord
-import re
 import asyncio
 import time
-from collections import defaultdict
+import itertools
+from functools import partial
+from typing import Dict, List, Tuple
 from database import Database
 from text_to_speech import TextToSpeech
 from loguru import logger
@@ -11,112 +11,253 @@ from aquestalk import AquesTalk1, AquesTalk2
 from voicevox import voicevox
 from aivisspeech import aivisspeech
 from config import Config
+from audio_cache import AudioCache
+from audio_source import create_audio_source
+from dictionary import DictionaryMatcher
+from chunking import split_sentences
+from normalizer import NormalizeContext, default_normalizer
+from message_queue import QueuedMessage
+from playback import PlaybackController
+from readiness import Readiness
+from metrics import MESSAGE_TO_SPEECH_SECONDS, STAGE_SECONDS, SYNTHESIS_SECONDS, register_gauge
+from tracing import Trace, current_trace, span, start_trace
+from session import GuildSession, sessions
+import synthesis_service
 
-current_voice_settings = {}
-message_queues = defaultdict(asyncio.Queue)
-reading_tasks = {}
+message_ids = itertools.count()
+audio_cache = AudioCache()
+_MISSING = object()
+ENGINES = ('voicevox', 'aivisspeech', 'aquestalk1', 'aquestalk2')
 
-async def speak_in_voice_channel(voice_client: discord.VoiceClient, message: discord.Message, voice_name: str, speed: int, engine: str):
-    if not voice_client or not voice_client.is_connected():
-        return
+def _cache_hit_ratios() -> Dict[Tuple[str, ...], float]:
+    return {
+        ('audio',): audio_cache.stats()['hit_rate'],
+        ('kana',): TextToSpeech().cache.hit_rate(),
+        ('voice_settings',): sessions.voice_settings.hit_rate()
+    }
+
+register_gauge('yomiage_queue_depth', 'サーバーごとの読み上げ待ちメッセージ数', ('guild',), lambda: {(str(session.guild_id),): session.queue.qsize() for session in sessions})
+register_gauge('yomiage_voice_sessions', '稼働中のセッション数', (), lambda: {(): len(sessions)})
+register_gauge('yomiage_cache_hit_ratio', 'キャッシュのヒット率', ('cache',), _cache_hit_ratios)
 
-    config = await Config.async_load_config()
-    debug = config['debug']
+async def synthesize(message: str, voice_name: str, speed: int, engine: str) -> bytes | None:
+    config = Config.get()
+    debug = config.debug
     if debug:
         logger.debug(f"音声合成開始: {message} - 使用する音声合成エンジン: {engine}")
         start_time = time.time()
 
-    try:
-        match engine:
-            case 'voicevox':
-                if not config['engine_enabled']['voicevox']:
-                    return
-                audio = voicevox(message, int(voice_name), float(speed))
-            case 'aivisspeech':
-                if not config['engine_enabled']['aivisspeech']:
-                    return
-                audio = aivisspeech(message, int(voice_name), float(speed))
-            case 'aquestalk1':
-                if not config['engine_enabled']['aquestalk1']:
-                    return
-                audio = AquesTalk1(message, speed, voice_name)
-            case 'aquestalk2':
-                if not config['engine_enabled']['aquestalk2']:
-                    return
-                audio = AquesTalk2(message, speed, voice_name)
-            case _:
-                raise ValueError(f"無効なエンジン: {engine}")
-
-        audio_file = await audio.get_audio()
-        if debug:
-            end_time = time.time()
-            logger.debug(f"音声合成完了 - 所要時間: {end_time - start_time}秒")
+    match engine:
+        case 'voicevox':
+            if not config.engine_enabled.voicevox:
+                return None
+            audio_class = voicevox
+            args = (message, int(voice_name), float(speed))
+        case 'aivisspeech':
+            if not config.engine_enabled.aivisspeech:
+                return None
+            audio_class = aivisspeech
+            args = (message, int(voice_name), float(speed))
+        case 'aquestalk1':
+            if not config.engine_enabled.aquestalk1:
+                return None
+            audio_class = AquesTalk1
+            args = (message, speed, voice_name)
+        case 'aquestalk2':
+            if not config.engine_enabled.aquestalk2:
+                return None
+            audio_class = AquesTalk2
+            args = (message, speed, voice_name)
+        case _:
+            raise ValueError(f"無効なエンジン: {engine}")
 
-        future = asyncio.Future()
+    if not Readiness.is_ready(engine):
         if debug:
-            logger.debug('音声再生が完了しました')
-        def after_playing(error):
-            if error:
-                future.set_exception(error)
+            logger.debug(f"{engine}の初期化完了を待機しています")
+        await Readiness.wait(engine)
+
+    edition = ('core' if config.voicevox.edition.core else 'engine') if engine == 'voicevox' else ''
+    cache_key = audio_cache.make_key(engine, voice_name, speed, message, edition)
+    with span('cache'):
+        audio_data = await audio_cache.get(cache_key)
+    if audio_data is None:
+        with span('synthesis', SYNTHESIS_SECONDS, engine):
+            if synthesis_service.handles(engine):
+                service = synthesis_service.get_service()
+                audio_data = await service.synthesize(engine, args)
+                if debug:
+                    logger.debug(f"音声合成ワーカーの状態: {service.stats()}")
             else:
-                future.set_result(None)
-            os.unlink(audio_file)
+                audio_data = await audio_class(*args).get_audio()
+        await audio_cache.put(cache_key, audio_data)
+    elif debug:
+        logger.debug(f"音声キャッシュを使用しました - {audio_cache.stats()}")
+    if debug:
+        end_time = time.time()
+        logger.debug(f"音声合成完了 - 所要時間: {end_time - start_time}秒")
+    return audio_data
+
+async def prepare_audio(message: str, voice_name: str, speed: int, engine: str, trace: Trace | None = None) -> discord.AudioSource | None:
+    current_trace.set(trace)
+    if engine.startswith('aquestalk'):
+        with span('kana', STAGE_SECONDS):
+            message = await TextToSpeech().convert(message)
+    audio_data = await synthesize(message, voice_name, speed, engine)
+    if audio_data is None:
+        return None
+    with span('conversion', STAGE_SECONDS):
+        return await asyncio.to_thread(create_audio_source, audio_data)
 
-        while voice_client.is_playing():
-            await asyncio.sleep(0.1)
+def get_controller(voice_client: discord.VoiceClient) -> PlaybackController:
+    session = sessions.get_or_create(voice_client.guild.id)
+    controller = session.controller
+    if controller is None or controller.voice_client is not voice_client:
+        if controller is not None:
+            controller.close()
+        controller = PlaybackController(voice_client)
+        session.controller = controller
+    return controller
 
-        voice_client.play(discord.FFmpegPCMAudio(audio_file, before_options='-guess_layout_max 0'), after=after_playing)
-        await future
-    except Exception as e:
-        logger.error(f"音声合成エラー: {e}\n入力メッセージ: {message}")
+def _discard_audio(task: asyncio.Task):
+    if not task.done():
+        task.cancel()
+        task.add_done_callback(_discard_audio)
+    elif not task.cancelled() and task.exception() is None and task.result() is not None:
+        task.result().cleanup()
 
 db = Database()
 
-async def process_message_queue(guild_id: int):
-    while True:
-        try:
-            message_data = await message_queues[guild_id].get()
-            if message_data is None:
-                break
+def _started_speaking(message: QueuedMessage, now: float):
+    MESSAGE_TO_SPEECH_SECONDS.observe(now - message.received_at)
+    if message.trace is not None:
+        message.trace.mark_audio_start(now)
+
+async def process_message_queue(session: GuildSession):
+    lookahead = max(1, Config.get().reader.lookahead)
+    queue = session.queue
+    pipeline = asyncio.Queue()
+    slots = asyncio.Semaphore(lookahead)
 
-            text, voice_name, speed, voice_client, engine = message_data
+    async def feed():
+        while True:
+            message = await queue.get()
+            if message is None:
+                pipeline.put_nowait(None)
+                return
+            now = time.perf_counter()
+            STAGE_SECONDS.observe(now - message.enqueued_at, 'queue_wait')
+            if message.trace is not None:
+                message.trace.add('queue_wait', message.enqueued_at, now)
+            voice_client = message.voice_client
+            message_id = next(message_ids)
+            chunks = split_sentences(message.text, Config.get().reader.chunk_length)
+            if not chunks:
+                queue.task_done()
+                if message.trace is not None:
+                    message.trace.finish()
+                continue
+            for i, chunk in enumerate(chunks):
+                await slots.acquire()
+                if session.skipped_message == message_id:
+                    slots.release()
+                    pipeline.put_nowait((None, chunk, voice_client, message_id, i == 0, i == len(chunks) - 1, message))
+                    break
+                task = asyncio.create_task(prepare_audio(chunk, message.voice_name, message.speed, message.engine, message.trace))
+                pipeline.put_nowait((task, chunk, voice_client, message_id, i == 0, i == len(chunks) - 1, message))
 
-            await speak_in_voice_channel(voice_client, text, voice_name, speed, engine)
+    feeder = asyncio.create_task(feed())
+    previous = None
+    try:
+        while True:
+            item = await pipeline.get()
+            if item is None:
+                break
+            task, text, voice_client, message_id, first, last, message = item
+            if task is not None:
+                slots.release()
+            finished = None
+            try:
+                if task is not None and session.skipped_message == message_id:
+                    _discard_audio(task)
+                elif task is not None:
+                    source = await task
+                    if source is not None and session.skipped_message == message_id:
+                        source.cleanup()
+                    elif source is not None and voice_client.is_connected():
+                        on_start = partial(_started_speaking, message) if first else None
+                        finished = get_controller(voice_client).enqueue(source, message_id, on_start)
+                        if previous is not None:
+                            await previous
+                        previous = finished
+                    elif source is not None:
+                        source.cleanup()
+            except asyncio.CancelledError:
+                if task is not None:
+                    _discard_audio(task)
+                raise
+            except Exception as e:
+                logger.error(f"音声合成エラー: {e}\n入力メッセージ: {text}")
+            finally:
+                if last or task is None:
+                    queue.task_done()
+                    if message.trace is not None:
+                        if finished is None:
+                            message.trace.finish()
+                        else:
+                            finished.add_done_callback(lambda _, trace=message.trace: trace.finish())
+    finally:
+        feeder.cancel()
+        session.skipped_message = None
+        while not pipeline.empty():
+            item = pipeline.get_nowait()
+            if item is not None and item[0] is not None:
+                _discard_audio(item[0])
 
-            message_queues[guild_id].task_done()
-        except Exception as e:
-            logger.error(f"メッセージキュー処理エラー: {e}")
-            continue
+def skip_current(guild_id: int):
+    session = sessions.get(guild_id)
+    if session is None or session.controller is None:
+        return
+    controller = session.controller
+    if controller.current_tag is not None:
+        session.skipped_message = controller.current_tag
+        controller.drop(controller.current_tag)
+
+async def stop_reading(guild_id: int):
+    await sessions.close(guild_id)
 
 async def read_message(message: str | discord.Message, guild: discord.Guild = None, author: discord.Member = None, channel: discord.TextChannel = None):
+    received_at = time.perf_counter()
     if isinstance(message, str):
         text = message
+        strip_spaces = False
     else:
         if message.author.bot:
             return
 
-        channels = await db.get_read_channels()
-        if message.guild.id not in channels or message.channel.id != channels[message.guild.id][1]:
+        if not Readiness.is_ready('database'):
+            await Readiness.wait('database')
+
+        if not db.is_read_channel(message.guild.id, message.channel.id):
             return
 
         guild = message.guild
         author = message.author
-        channel = message.channel
-        text = message.content.replace('\n', '').replace(' ', '')
+        text = message.content
+        strip_spaces = True
 
     voice_client = guild.voice_client
     if voice_client is None or not voice_client.is_connected():
         return
 
-    dictionary_replacements = await db.get_dictionary_replacements(guild.id)
-    for original, replacement in dictionary_replacements.items():
-        text = text.replace(original, replacement)
+    trace = start_trace(guild.id, received_at)
+    session = sessions.get_or_create(guild.id)
+    with span('dictionary', STAGE_SECONDS):
+        matcher = await get_dictionary_matcher(guild.id)
+    with span('normalize', STAGE_SECONDS):
+        text = default_normalizer.normalize(text, NormalizeContext(guild, session.names, matcher, strip_spaces=strip_spaces))
 
-    voice_settings = current_voice_settings.get((guild.id, author.id if author else 0))
-    if voice_settings is None and author:
-        voice_settings = await db.get_voice_settings(guild.id, author.id)
-        if voice_settings:
-            current_voice_settings[(guild.id, author.id)] = voice_settings
+    with span('settings', STAGE_SECONDS):
+        voice_settings = await get_voice_settings(guild.id, author.id) if author else None
 
     voice_name = '2'
     speed = 100
@@ -125,30 +266,60 @@ async def read_message(message: str | discord.Message, guild: discord.Guild = No
     if voice_settings:
         voice_name, speed, engine = voice_settings
 
-    for match in re.finditer(r'<@!?(\d+)>', text):
-        user_id = int(match.group(1))
-        user = guild.get_member(user_id)
-        if user:
-            text = text.replace(match.group(0), user.display_name)
-    
-    for channel_id_str in re.findall(r'<#(\d+)>', text):
-        channel_id = int(channel_id_str)
-        channel = guild.get_channel(channel_id)
-        if channel:
-            cleaned_channel_name = re.sub(r'[\U0001F300-\U0001F64F\U0001F680-\U0001F6FF\u2600-\u26FF\u2700-\u27BF]', '', channel.name)
-            text = text.replace(f'<#{channel_id_str}>', cleaned_channel_name)
+    if sessions.get(guild.id) is not session or not voice_client.is_connected():
+        if trace is not None:
+            trace.discard()
+        return
 
-    text = re.sub(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+(?:\/[^\s]*)?', 'URL省略', text)
+    session.touch()
+    session.queue.offer(QueuedMessage(text, voice_name, speed, voice_client, engine, author.id if author else None, received_at=received_at, trace=trace))
 
-    text = re.sub(r'<:[a-zA-Z0-9_]+:[0-9]+>', '', text)
+    if session.reader is None or session.reader.done():
+        session.reader = asyncio.create_task(process_message_queue(session))
 
-    if engine.startswith('aquestalk'):
-        text = TextToSpeech(text).convert_text_to_speech()
+async def get_dictionary_matcher(guild_id: int) -> DictionaryMatcher:
+    session = sessions.get_or_create(guild_id)
+    matcher = session.matcher
+    if matcher is None:
+        generation = session.dictionary_generation
+        matcher = DictionaryMatcher(await db.get_dictionary_replacements(guild_id))
+        if generation == session.dictionary_generation:
+            session.matcher = matcher
+        if Config.get().debug:
+            logger.debug(f"{guild_id}の辞書を構築しました - {len(matcher)}件")
+    return matcher
+
+def invalidate_names(guild_id: int):
+    session = sessions.get(guild_id)
+    if session is not None:
+        session.names.clear()
 
-    await message_queues[guild.id].put((text, voice_name, speed, voice_client, engine))
+def invalidate_dictionary(guild_id: int):
+    session = sessions.get(guild_id)
+    if session is not None:
+        session.dictionary_generation += 1
+        session.matcher = None
 
-    if guild.id not in reading_tasks or reading_tasks[guild.id].done():
-        reading_tasks[guild.id] = asyncio.create_task(process_message_queue(guild.id))
+async def get_voice_settings(guild_id: int, user_id: int) -> Tuple[str, int, str] | None:
+    cache = sessions.voice_settings
+    voice_settings = cache.get((guild_id, user_id), _MISSING)
+    if voice_settings is _MISSING:
+        voice_settings = await db.get_voice_settings(guild_id, user_id)
+        if (guild_id, user_id) not in cache:
+            cache.put((guild_id, user_id), tuple(voice_settings) if voice_settings else None)
+    return voice_settings
+
+async def preload_voice_settings(guild_id: int, members: List[discord.Member]):
+    cache = sessions.voice_settings
+    user_ids = [m.id for m in members if not m.bot and (guild_id, m.id) not in cache]
+    if not user_ids:
+        return
+    settings = await db.get_voice_settings_bulk(guild_id, user_ids)
+    for user_id in user_ids:
+        if (guild_id, user_id) not in cache:
+            cache.put((guild_id, user_id), settings.get(user_id))
+    if Config.get().debug:
+        logger.debug(f"{guild_id}のボイス設定を{len(user_ids)}人分読み込みました")
 
 async def update_voice_settings(guild_id: int, user_id: int, voice_name: str, speed: int, engine: str):
-    current_voice_settings[(guild_id, user_id)] = (voice_name, speed, engine)
+    sessions.voice_settings.put((guild_id, user_id), (voice_name, speed, engine))
@@ -1,12 +1,14 @@
 import os
-import aiohttp
-import aiofiles
+import asyncio
 import platform
 from config import Config
+from http_client import get_router
 from pathlib import Path
 from loguru import logger
 from voicevox_core.asyncio import Onnxruntime, OpenJtalk, Synthesizer, VoiceModelFile
+from collections import OrderedDict
 from typing import Dict
+from uuid import UUID
 
 class VoicevoxConfig:
     def get_default_config() -> Dict:
@@ -27,20 +29,20 @@ class voicevox:
     _instance = None
     _synthesizer = None
     _initialized = False
+    _style_models: Dict[int, Path] = {}
+    _model_ids: Dict[Path, UUID] = {}
+    _loaded_models: OrderedDict = OrderedDict()
+    _model_locks: Dict[Path, asyncio.Lock] = {}
+    _model_users: Dict[Path, int] = {}
 
     def __init__(self, text: str, style_id: int = 0, speed: float = 1.0):
         self.text = text
         self.style_id = style_id
         self.speed = speed
         self.voicevox_config = VoicevoxConfig.get_default_config()
-        self.temp_file = None
-        self.config = Config.load_config()
-        if self.config['voicevox']['edition']['engine']:
-            self.url = self.config['voicevox']['url']
-            self.params = {
-                'text': text,
-                'speaker': style_id
-            }
+        self.config = Config.get()
+        if self.config.voicevox.edition.engine:
+            self.engine_config = self.config.voicevox
 
         if voicevox._instance is None:
             voicevox._instance = self
@@ -57,78 +59,85 @@ class voicevox:
 
                 cls._synthesizer = Synthesizer(onnxruntime, open_jtalk)
 
-            model_count = 0
-            model_loaded = set()
-            for model_file in Path(cls._instance.voicevox_config['vvm_path']).glob('*.vvm'):
+            for model_file in sorted(Path(cls._instance.voicevox_config['vvm_path']).glob('*.vvm')):
                 try:
-                    model_id = model_file.stem
-                    if model_id not in model_loaded:
-                        async with await VoiceModelFile.open(model_file) as model:
-                            await cls._synthesizer.load_voice_model(model)
-                        if cls._instance.config['debug']:
-                            logger.debug(f"モデル {model_file.name} を読み込みました")
-                        model_count += 1
-                        model_loaded.add(model_id)
+                    async with await VoiceModelFile.open(model_file) as model:
+                        cls._model_ids[model_file] = model.id
+                        for character in model.metas:
+                            for style in character.styles:
+                                cls._style_models.setdefault(style.id, model_file)
                 except Exception as e:
                     logger.error(f"モデル {model_file.name} の読み込みに失敗しました: {e}")
                     continue
 
             cls._initialized = True
-            logger.success('voicevoxの初期化に成功しました')
+            logger.success(f"voicevoxの初期化に成功しました - モデル: {len(cls._model_ids)}件, スタイル: {len(cls._style_models)}件")
 
-    async def get_audio(self) -> str:
+    @classmethod
+    async def _ensure_model(cls, style_id: int) -> Path:
+        model_file = cls._style_models.get(style_id)
+        if model_file is None:
+            raise RuntimeError(f"スタイルID {style_id} のモデルが見つかりません")
+
+        if model_file not in cls._loaded_models:
+            lock = cls._model_locks.setdefault(model_file, asyncio.Lock())
+            async with lock:
+                if model_file not in cls._loaded_models:
+                    async with await VoiceModelFile.open(model_file) as model:
+                        await cls._synthesizer.load_voice_model(model)
+                    cls._loaded_models[model_file] = model_file.stat().st_size
+                    if Config.get().debug:
+                        logger.debug(f"モデル {model_file.name} を読み込みました")
+                    cls._evict_models(model_file)
+
+        cls._loaded_models.move_to_end(model_file)
+        return model_file
+
+    @classmethod
+    def _evict_models(cls, keep: Path | None = None) -> None:
+        config = Config.get().voicevox
+        for model_file in list(cls._loaded_models):
+            over_count = config.max_loaded_models > 0 and len(cls._loaded_models) > config.max_loaded_models
+            over_memory = config.max_model_memory > 0 and sum(cls._loaded_models.values()) > config.max_model_memory
+            if not over_count and not over_memory:
+                break
+            if model_file == keep or cls._model_users.get(model_file, 0) > 0 or cls._model_locks[model_file].locked():
+                continue
+            cls._synthesizer.unload_voice_model(cls._model_ids[model_file])
+            del cls._loaded_models[model_file]
+            if Config.get().debug:
+                logger.debug(f"モデル {model_file.name} を解放しました")
+
+    async def get_audio(self) -> bytes:
         try:
-            if self.config['debug']:
+            if self.config.debug:
                 logger.debug(f"音声生成を開始 - テキスト: {self.text}, スタイルID: {self.style_id}, 速度: {self.speed}")
-            if self.config['voicevox']['edition']['core']:
+            if self.config.voicevox.edition.core:
                 if voicevox._synthesizer is None:
                     raise RuntimeError('シンセサイザーが初期化されていません')
 
-                audio_query = await voicevox._synthesizer.create_audio_query(self.text, self.style_id)
-                audio_query.speed_scale = self.speed
-                wav = await voicevox._synthesizer.synthesis(audio_query, self.style_id)
-
-            elif self.config['voicevox']['edition']['engine']:
+                model_file = await voicevox._ensure_model(self.style_id)
+                voicevox._model_users[model_file] = voicevox._model_users.get(model_file, 0) + 1
+                try:
+                    audio_query = await voicevox._synthesizer.create_audio_query(self.text, self.style_id)
+                    audio_query.speed_scale = self.speed
+                    wav = await voicevox._synthesizer.synthesis(audio_query, self.style_id)
+                finally:
+                    voicevox._model_users[model_file] -= 1
+                voicevox._evict_models()
+
+            elif self.config.voicevox.edition.engine:
                 wav = await self._get_engine()
             else:
                 raise RuntimeError('voicevoxのエンジンが有効になっていません')
 
-            if self.config['debug']:
+            if self.config.debug:
                 logger.debug('音声生成が完了しました')
-            async with aiofiles.tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp:
-                self.temp_file = temp.name
-                await temp.write(wav)
-            if self.config['debug']:
-                logger.debug(f"一時ファイルを作成 - {self.temp_file}")
 
-            return self.temp_file
+            return wav
 
         except Exception as e:
             raise RuntimeError(e)
 
     async def _get_engine(self) -> bytes:
-        async with aiohttp.ClientSession(self.url) as session:
-            json_response = await session.post(
-                '/audio_query',
-                headers={
-                    'Content-Type': 'application/json'
-                },
-                params=self.params
-            )
-            json_data = await json_response.json()
-            json_data['speedScale'] = self.speed
-            if json_response.status != 200:
-                raise Exception(f"audio_queryのリクエストに失敗しました: {json_data['detail'][0]['msg']}")
-            del self.params['text']
-            response = await session.post(
-                '/synthesis',
-                headers={
-                    'Content-Type': 'application/json',
-                    'Accept': 'audio/wav'
-                },
-                params=self.params,
-                json=json_data
-            )
-            if response.status != 200:
-                raise Exception(f"synthesisのリクエストに失敗しました: {await response.json()['detail'][0]['msg']}")
-            return await response.read()
+        return await get_router(self.engine_config).synthesize(self.text, self.style_id, self.speed)